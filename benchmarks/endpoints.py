@@ -0,0 +1,292 @@
+# Endpoint benchmarks: boots main.app in-process against a seeded database and an
+# in-process S3 stand-in (moto), and records throughput and latency percentiles as JSON.
+#
+#   python -m benchmarks.endpoints                                   # temporary SQLite file
+#   python -m benchmarks.endpoints --database-url postgresql+psycopg2://.../monova_bench
+#
+# The schema is dropped and re-seeded for every dataset size: only point
+# --database-url at a throwaway database.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+COUNTRIES = ["LV", "LT", "PL", "EE"]
+BENCH_PASSWORD = "bench-password"
+CV_BYTES = b"%PDF-1.4\n" + os.urandom(200 * 1024)
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    p.add_argument("--sizes", default="200,2000", help="comma separated job counts to seed")
+    p.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    p.add_argument("--login-requests", type=int, default=20, help="bcrypt makes /login much slower")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--only", default=None, help="comma separated endpoint names")
+    p.add_argument("--out", default="benchmark-results.json")
+    return p.parse_args()
+
+
+def configure_env(args) -> str:
+    # must happen before anything imports database / services.storage
+    url = args.database_url or f"sqlite:///{tempfile.mkdtemp(prefix='monova-bench-')}/bench.db"
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("CV_S3_BUCKET", "monova-bench")
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    os.environ.pop("S3_ENDPOINT_URL", None)
+    return url
+
+
+def seed(size: int) -> dict:
+    from sqlalchemy import insert
+
+    from database import Base, SessionLocal, engine
+    from models.application import Application
+    from models.job import Job
+    from models.job_translations import JobTranslation
+    from models.user import User
+    from services.security import hash_password
+    from services.stats import rebuild_stats, recount_applications
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    rnd = random.Random(size)
+    now = datetime.now(timezone.utc)
+    password_hash = hash_password(BENCH_PASSWORD)
+    n_users = max(size // 2, 10)
+
+    db = SessionLocal()
+    try:
+        db.execute(insert(User), [
+            {
+                "userEmail": f"user{i}@bench-mail.com",
+                "userPasswordEncrypted": password_hash,
+                "userName": f"User{i}",
+                "userCitizenship": rnd.choice(COUNTRIES),
+                "userEmploymentStatus": "unemployed",
+                "isAdmin": i == 0,
+                "tokenVersion": 0,
+                "userCreatedAt": now - timedelta(days=rnd.randrange(90)),
+            }
+            for i in range(n_users)
+        ])
+        db.execute(insert(Job), [
+            {
+                "title": f"Job {i}",
+                "reference_code": f"BENCH-{i}",
+                "country": rnd.choice(COUNTRIES),
+                "city": "Riga",
+                "category": rnd.choice(["logistics", "construction", "agriculture", "production"]),
+                "salary_from": float(rnd.randrange(800, 3000)),
+                "salary_to": float(rnd.randrange(3000, 5000)),
+                "short_description": "Short description " * 5,
+                "full_description": "Full description of the position. " * 60,
+                "responsibilities": "Responsibilities. " * 20,
+                "requirements_text": "Requirements. " * 20,
+                "benefits_text": "Benefits. " * 20,
+                "is_active": True,
+                "created_at": now - timedelta(minutes=i),
+                "updated_at": now - timedelta(minutes=i),
+            }
+            for i in range(size)
+        ])
+        db.execute(insert(JobTranslation), [
+            {
+                "job_id": job_id,
+                "lang_code": lang,
+                "title": f"{lang} job {job_id}",
+                "short_description": f"{lang} short " * 5,
+                "full_description": f"{lang} full description. " * 60,
+            }
+            for job_id in range(1, size + 1)
+            for lang in ("ru", "lt")
+        ])
+        # users 1..n apply to a few jobs each; the "reader" user gets a fuller history
+        pairs = {(1, j) for j in rnd.sample(range(1, size + 1), min(size, 50))}
+        while len(pairs) < size * 2:
+            pairs.add((rnd.randrange(2, n_users + 1), rnd.randrange(1, size + 1)))
+        db.execute(insert(Application), [
+            {"user_id": u, "job_id": j, "status": "applied", "created_at": now - timedelta(days=rnd.randrange(30))}
+            for u, j in pairs
+        ])
+        db.commit()
+        rebuild_stats(db)
+        recount_applications(db)
+    finally:
+        db.close()
+
+    return {"jobs": size, "users": n_users, "applications": len(pairs), "applied": pairs}
+
+
+def scenarios(size: int, n_users: int, applied: set, counts: dict):
+    from services.security import create_access_token
+
+    token = lambda uid, admin=False: {
+        "Authorization": "Bearer " + create_access_token({"sub": str(uid), "isAdmin": admin, "ver": 0})
+    }
+    admin = token(1, True)
+    reader = token(1)
+    rnd = random.Random(0)
+
+    # fresh (user, job) pairs, so every POST /applications really inserts
+    fresh = (
+        (u, j)
+        for u in range(2, n_users + 1)
+        for j in range(1, size + 1)
+        if (u, j) not in applied
+    )
+    tokens = {}
+
+    def apply_request(i):
+        u, j = next(fresh)
+        headers = tokens.get(u) or tokens.setdefault(u, token(u))
+        return "POST", "/applications", {"json": {"job_id": j}, "headers": headers}
+
+    def login_request(i):
+        email = f"user{rnd.randrange(n_users)}@bench-mail.com"
+        return "POST", "/login", {"json": {"email": email, "password": BENCH_PASSWORD}}
+
+    def cv_request(i):
+        files = {"file": ("cv.pdf", CV_BYTES, "application/pdf")}
+        return "POST", "/profile/cv/upload", {"files": files, "headers": token(2 + i % (n_users - 1))}
+
+    get = lambda path, headers=None: (lambda i: ("GET", path(i) if callable(path) else path, {"headers": headers or {}}))
+
+    return {
+        "login": (login_request, counts["login"]),
+        "jobs_en_LV": (get("/jobs?lang=en&country=LV"), counts["default"]),
+        "jobs_ru_PL": (get("/jobs?lang=ru&country=PL"), counts["default"]),
+        "jobs_lt_popularity": (get("/jobs?lang=lt&sort=popularity"), counts["default"]),
+        "job_detail": (get(lambda i: f"/jobs/{rnd.randrange(1, size + 1)}?lang=ru"), counts["default"]),
+        "applications_create": (apply_request, counts["default"]),
+        "applications_me": (get("/applications/me", reader), counts["default"]),
+        "cv_upload": (cv_request, counts["default"]),
+        "admin_users": (get("/admin/users?limit=50", admin), counts["default"]),
+        "admin_jobs": (get("/admin/jobs", admin), counts["default"]),
+        "admin_stats": (get("/admin/stats", admin), counts["default"]),
+    }
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+async def measure(client, make_request, total: int, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        nonlocal errors
+        method, url, kwargs = make_request(i)
+        async with sem:
+            start = time.perf_counter()
+            r = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+        if r.status_code >= 400:
+            errors += 1
+
+    # warm-up (render caches, TypeAdapters, pool connections), not recorded
+    for i in range(min(3, total)):
+        method, url, kwargs = make_request(-1 - i)
+        await client.request(method, url, **kwargs)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 3) if v is not None else None
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / wall, 2),
+        "mean_ms": ms(sum(latencies) / len(latencies)),
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1]),
+    }
+
+
+async def run(args, sizes, only):
+    import httpx
+    import boto3
+
+    import main
+    from database import async_engine, engine
+    from services.storage import S3_BUCKET_NAME, S3_REGION
+
+    boto3.client("s3", region_name=S3_REGION).create_bucket(Bucket=S3_BUCKET_NAME)
+
+    results = []
+    transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for size in sizes:
+            data = seed(size)
+            print(f"seeded {data['jobs']} jobs, {data['users']} users, {data['applications']} applications")
+            counts = {"default": args.requests, "login": args.login_requests}
+            for name, (make_request, total) in scenarios(size, data["users"], data["applied"], counts).items():
+                if only and name not in only:
+                    continue
+                stats = await measure(client, make_request, total, args.concurrency)
+                results.append({"endpoint": name, "dataset_jobs": size, "concurrency": args.concurrency, **stats})
+                print(f"  {name:<22} {stats['throughput_rps']:>9.1f} req/s  p50 {stats['p50_ms']:>8.2f}  "
+                      f"p95 {stats['p95_ms']:>8.2f}  p99 {stats['p99_ms']:>8.2f} ms  errors {stats['errors']}")
+
+    await async_engine.dispose()
+    engine.dispose()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def main():
+    args = parse_args()
+    url = configure_env(args)
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    only = set(args.only.split(",")) if args.only else None
+
+    from moto import mock_aws
+
+    with mock_aws():
+        results = asyncio.run(run(args, sizes, only))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "database": url.split(":", 1)[0],
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "argv": sys.argv[1:],
+        },
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Response serialization: FastAPI's response_model path vs services.fast_json.
+# Run from the repo root: python -m benchmarks.serialization [items] [rounds]
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+import create_tables  # registers every model
+from models.job import Job
+from router.jobs_router_utils import job_to_dict
+from schemas.admin import AdminJobBase
+from schemas.job import JobOut
+from services.fast_json import fast_response
+
+
+def make_jobs(n: int) -> list[Job]:
+    now = datetime.now(timezone.utc)
+    return [
+        Job(
+            id=i, title=f"Warehouse operative {i}", company_name="Monova", reference_code=f"REF-{i}",
+            country="LV", city="Riga", category="logistics", employment_type="FULLTIME",
+            shift_type="DAY", salary_from=1200.0 + i, salary_to=1800.0 + i, currency="EUR",
+            salary_type="monthly", is_net=True, housing_provided=True, transport_provided=False,
+            short_description="Picking and packing orders " * 4, full_description="Full description. " * 40,
+            responsibilities="Picking, packing, loading. " * 5, requirements_text="Basic English. " * 5,
+            benefits_text="Housing and meals. " * 5, is_active=True, created_at=now, updated_at=now,
+            applications_count=i % 17, translations=[],
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+async def baseline(data, model):
+    # what a plain `return data` does for a route declared with response_model=model
+    field = create_model_field(name="Response", type_=model, mode="serialization")
+    content = await serialize_response(field=field, response_content=data)
+    return JSONResponse(content)
+
+
+def timed(fn, rounds: int) -> float:
+    fn()  # warm-up (and TypeAdapter compilation)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds
+
+
+def run(items: int = 100, rounds: int = 200) -> list[dict]:
+    jobs = make_jobs(items)
+    dicts = [job_to_dict(j, "en") for j in jobs]
+    loop = asyncio.new_event_loop()
+
+    cases = [
+        ("jobs list (trusted dicts)", List[JobOut], dicts, lambda: fast_response(dicts)),
+        ("admin jobs (ORM objects)", List[AdminJobBase], jobs, lambda: fast_response(jobs, list[AdminJobBase])),
+    ]
+    results = []
+    for name, model, data, fast in cases:
+        before = timed(lambda: loop.run_until_complete(baseline(data, model)), rounds)
+        after = timed(fast, rounds)
+        assert json.loads(fast().body) == json.loads(loop.run_until_complete(baseline(data, model)).body), \
+            f"{name}: payloads differ"
+        results.append({
+            "case": name,
+            "items": items,
+            "baseline_ms": round(before * 1000, 3),
+            "fast_ms": round(after * 1000, 3),
+            "speedup": round(before / after, 2),
+        })
+    loop.close()
+    return results
+
+
+if __name__ == "__main__":
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    for r in run(items, rounds):
+        print(f"{r['case']:<28} {r['items']:>5} items  before {r['baseline_ms']:>8.3f} ms"
+              f"  after {r['fast_ms']:>8.3f} ms  x{r['speedup']}")
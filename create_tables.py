@@ -1,15 +1,147 @@
-from database import engine, Base
+import hashlib
+import os
+
+from sqlalchemy import func, inspect, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateIndex
+
+from database import DATABASE_URL, SessionLocal, dialect_insert, engine, Base
 from models.user import User
 from models.user_experience import UserExperience
 from models.job import Job
 from models.application import Application
 from models.job_translations import JobTranslation
 from models.email import EmailContact
+from models.stats import StatCounter
+from models.outbox import OutboxEvent
+from models.schema_version import SchemaVersion
+import models.job_search
+from migrations import LATEST_MIGRATION, pending_migrations
+
+# migrate at startup when the schema is behind; otherwise the boot fails listing what's missing.
+# On by default only for local SQLite databases
+SCHEMA_AUTO_CREATE = os.getenv(
+    "SCHEMA_AUTO_CREATE", "true" if DATABASE_URL.startswith("sqlite") else "false"
+).lower() in ("1", "true", "yes", "on")
+
+
+def schema_fingerprint() -> str:
+    # changes whenever a table, column or index is added, dropped or retyped
+    parts = []
+    for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        parts.append(table.name)
+        parts += [f"{c.name}:{type(c.type).__name__}:{c.nullable}" for c in table.columns]
+        parts += sorted(i.name or "" for i in table.indexes)
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:16]
+
+
+# "<last applied migration>+<models fingerprint>"; a model change without a migration
+# still shows up as a mismatch and gets its columns checked
+SCHEMA_VERSION = f"{LATEST_MIGRATION}+{schema_fingerprint()}"
+
+
+def missing_columns(conn) -> list[str]:
+    insp = inspect(conn)
+    tables = set(insp.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            missing.append(table.name)
+            continue
+        present = {c["name"] for c in insp.get_columns(table.name)}
+        missing += [f"{table.name}.{c.name}" for c in table.columns if c.name not in present]
+    return missing
+
+
+def _index_names(conn) -> set[str]:
+    # SQLite reflection skips expression indexes, so ask its catalog directly
+    if conn.dialect.name == "sqlite":
+        return set(conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'").scalars())
+    insp = inspect(conn)
+    return {i["name"] for t in insp.get_table_names() for i in insp.get_indexes(t)}
+
+
+def missing_indexes(conn) -> list:
+    # declared indexes this dialect would build (the Postgres search indexes are ddl_if-gated)
+    existing = _index_names(conn)
+    return [
+        index
+        for table in Base.metadata.sorted_tables
+        for index in table.indexes
+        if index.name not in existing and CreateIndex(index)._should_execute(index, conn)
+    ]
 
-def create_all_tables():
-    print("Creating tables if not exist...")
+
+def _stored_version(conn) -> str | None:
+    try:
+        return conn.execute(select(SchemaVersion.version).where(SchemaVersion.id == 1)).scalar()
+    except SQLAlchemyError:
+        conn.rollback()
+        return None  # schema_version doesn't exist yet
+
+
+def _stamp(db, version: str) -> None:
+    # upsert, every worker may verify and stamp the same version on boot
+    stmt = dialect_insert(db)(SchemaVersion).values(id=1, version=version)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[SchemaVersion.id],
+        set_={"version": stmt.excluded.version, "applied_at": func.now()},
+    ))
+
+
+def migrate():
+    print("Migrating schema...")
+    # new tables first, migrations may backfill into them
     Base.metadata.create_all(bind=engine)
-    print("Done.")
+
+    with SessionLocal() as db:
+        stored = _stored_version(db.connection())
+        for name, step in pending_migrations(stored.split("+")[0] if stored else None):
+            print(f"  {name}")
+            step(db)
+            _stamp(db, name)
+            db.commit()
+
+        conn = db.connection()
+        missing = missing_columns(conn)
+        if missing:
+            db.rollback()
+            raise RuntimeError(f"Schema still missing after migrations: {', '.join(missing)}; add a migration")
+
+        # indexes declared on tables that already existed
+        for index in missing_indexes(conn):
+            index.create(conn)
+        _stamp(db, SCHEMA_VERSION)
+        db.commit()
+    print(f"Done, schema version {SCHEMA_VERSION}.")
+
+
+def ensure_schema(auto_create: bool = SCHEMA_AUTO_CREATE) -> bool:
+    # one primary-key lookup on an up-to-date database; returns True if it had to migrate
+    with engine.connect() as conn:
+        stored = _stored_version(conn)
+        if stored == SCHEMA_VERSION:
+            return False
+        missing = missing_columns(conn)
+        if not missing:
+            missing += [f"index {i.name}" for i in missing_indexes(conn)]
+        # unapplied steps may carry backfills even when the columns are already there
+        missing += [f"migration {name}" for name, _ in pending_migrations(stored.split("+")[0] if stored else None)]
+
+    if auto_create:
+        migrate()
+        return True
+    if missing:
+        raise RuntimeError(
+            f"Database schema is behind the models, missing: {', '.join(missing)}; run python create_tables.py"
+        )
+
+    # no drift, so the version can be recorded as verified
+    with SessionLocal() as db:
+        _stamp(db, SCHEMA_VERSION)
+        db.commit()
+    return False
+
 
 if __name__ == "__main__":
-    create_all_tables()
+    migrate()
@@ -1,33 +1,53 @@
 import os
+import time
+
+from services import startup
 
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
+startup.mark("import:framework")
 
-from database import engine, get_db
+from database import async_engine, get_async_db, replicas
 # schemas
 from schemas.user import UserCreate, UserOut, LoginRequest
 # models
 from models.user import User
 # services
-from services.security import hash_password, verify_password, create_access_token
+from services.security import (
+    HasherBusy, create_access_token, hash_password_async, verify_and_update_password_async,
+)
+from services.stats import bump_stats_async, signup_buckets
+from services.compression import CompressionMiddleware
+from services.metrics import MetricsMiddleware, render_metrics
+from services.replicas import RYW_HEADER, ReadYourWritesMiddleware
+startup.mark("import:services")
 # routes
 from router.jobs_router import jobs_router
 from router.profile_router import profile_router
 from router.applications_router import application_router
 from router.admin_router import admin_router
 from router.email_router import email_router
+startup.mark("import:routers")
 
 app = FastAPI(title="Monova Auth API")
 
+app.add_middleware(CompressionMiddleware)
+# outside compression, so timings include it
+app.add_middleware(MetricsMiddleware)
+if replicas:
+    app.add_middleware(ReadYourWritesMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[os.getenv("FRONTEND_ORIGIN", "http://localhost:4200")],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", "Idempotent-Replayed", "Server-Timing", RYW_HEADER],
 )
 
 app.include_router(jobs_router, prefix="/jobs", tags=["job"])
@@ -38,38 +58,80 @@ app.include_router(email_router, prefix="/email", tags=["Email"])
 
 @app.on_event("startup")
 def on_startup():
-    from database import Base
-    Base.metadata.create_all(bind=engine)
+    start = time.perf_counter()
+    # create_tables registers every model; migrations only run when the stored schema version is stale
+    from create_tables import ensure_schema
+    migrated = ensure_schema()
+    startup.record("schema:migrate" if migrated else "schema:check", time.perf_counter() - start)
+    print("Startup:", startup.report())
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await async_engine.dispose()
+    for replica in replicas.replicas:
+        await replica.async_engine.dispose()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 240
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Too many sign-in requests, please retry shortly.",
+        headers={"Retry-After": "1"},
+    )
+
 @app.post("/login", status_code=201)
-def login_user(form_data: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.userEmail == form_data.email).first()
+async def login_user(form_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    user = (await db.execute(
+        select(User).where(User.userEmail == form_data.email).limit(1)
+    )).scalar_one_or_none()
     
     if not user:
         raise HTTPException(status_code=404, detail="Account not found.")
-    if not verify_password(form_data.password, user.userPasswordEncrypted):
+
+    try:
+        valid, new_hash = await verify_and_update_password_async(
+            form_data.password, user.userPasswordEncrypted
+        )
+    except HasherBusy:
+        raise _hasher_busy()
+
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid password.")
+
+    if new_hash:
+        # stored hash uses outdated cost settings, upgrade it transparently
+        user.userPasswordEncrypted = new_hash
+        await db.commit()
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    token = create_access_token(data={"sub": str(user.userId), "isAdmin": user.isAdmin}, expires_delta=access_token_expires)
+    token = create_access_token(
+        data={"sub": str(user.userId), "isAdmin": user.isAdmin, "ver": user.tokenVersion or 0},
+        expires_delta=access_token_expires,
+    )
 
     return {"access_token": token, "token_type": "bearer"}
 
 
 @app.post("/createUser", response_model=UserOut, status_code=201)
-def create_user(payload: UserCreate, db: Session = Depends(get_db)):
+async def create_user(payload: UserCreate, db: AsyncSession = Depends(get_async_db)):
     email = payload.userEmail.lower().strip()
 
-    existing = db.execute(
+    existing = (await db.execute(
         select(User).where(User.userEmail == email)
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
 
     if existing:
         raise HTTPException(status_code=400, detail="User with this email already exists")
 
-    password_hashed = hash_password(payload.password)
+    try:
+        password_hashed = await hash_password_async(payload.password)
+    except HasherBusy:
+        raise _hasher_busy()
 
     user = User(
         userEmail=email,
@@ -84,9 +146,12 @@ def create_user(payload: UserCreate, db: Session = Depends(get_db)):
         isAdmin = False 
     )
 
+    user.userCreatedAt = datetime.now(timezone.utc)
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.flush()
+    await bump_stats_async(db, signup_buckets(user))
+    await db.commit()
+    await db.refresh(user)
 
     return user
 
@@ -0,0 +1,56 @@
+from sqlalchemy import inspect, text
+
+from models.job import Job
+from services.stats import rebuild_stats, recount_applications
+
+# Schema changes for databases created before a model change: create_all only creates
+# missing tables, it never adds columns to existing ones. Steps run in order and each one
+# is idempotent, so they are safe on a database create_all already built with the change.
+
+
+def has_column(db, table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(db.connection()).get_columns(table)}
+
+
+def add_column(db, table: str, column: str, ddl: str) -> bool:
+    # returns False when the column already exists, so backfills only run once
+    if has_column(db, table, column):
+        return False
+    db.execute(text(f'ALTER TABLE {table} ADD COLUMN "{column}" {ddl}'))
+    return True
+
+
+def _users_token_version(db):
+    add_column(db, "users", "tokenVersion", "INTEGER NOT NULL DEFAULT 0")
+
+
+def _users_created_at_and_stats(db):
+    # existing users keep NULL: their signup date is unknown and they stay out of signups_by_day
+    if add_column(db, "users", "userCreatedAt", "TIMESTAMP WITH TIME ZONE") and db.get_bind().dialect.name == "postgresql":
+        db.execute(text('ALTER TABLE users ALTER COLUMN "userCreatedAt" SET DEFAULT now()'))
+    # stat_counters was just created by create_all; full recount, so replaying it is harmless
+    rebuild_stats(db)
+
+
+def _jobs_applications_count(db):
+    if add_column(db, "jobs", "applications_count", "INTEGER NOT NULL DEFAULT 0"):
+        recount_applications(db)
+    # the popularity sort's index needs the column, so it is created here rather than left to migrate()
+    popularity = next(i for i in Job.__table__.indexes if i.name == "ix_jobs_active_popularity_id")
+    popularity.create(db.connection(), checkfirst=True)
+
+
+MIGRATIONS = [
+    ("0001_users_token_version", _users_token_version),
+    ("0002_users_created_at_stats", _users_created_at_and_stats),
+    ("0003_jobs_applications_count", _jobs_applications_count),
+]
+
+LATEST_MIGRATION = MIGRATIONS[-1][0]
+
+
+def pending_migrations(applied: str | None) -> list:
+    # unknown or missing markers (databases older than this list) replay every step
+    ids = [name for name, _ in MIGRATIONS]
+    start = ids.index(applied) + 1 if applied in ids else 0
+    return MIGRATIONS[start:]
@@ -1,11 +1,19 @@
 from database import Base
-from sqlalchemy import Column, Integer, Text, String, Float, Boolean, DateTime
+from sqlalchemy import Column, Integer, Text, String, Float, Boolean, DateTime, Index, func
 from datetime import datetime, timezone
 from sqlalchemy.orm import relationship
 
 class Job(Base):
     __tablename__ = "jobs"
 
+    # composite indexes backing the keyset-paginated public listing
+    __table_args__ = (
+        Index("ix_jobs_active_created_id", "is_active", "created_at", "id"),
+        Index("ix_jobs_active_country_created_id", "is_active", "country", "created_at", "id"),
+        Index("ix_jobs_active_category_created_id", "is_active", "category", "created_at", "id"),
+        Index("ix_jobs_active_popularity_id", "is_active", "applications_count", "id"),
+    )
+
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
 
     # Display / identity
@@ -53,6 +61,9 @@ class Job(Base):
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     image = Column(String(255), nullable=True)
 
+    # denormalized COUNT(*) of applications, maintained by services.stats
+    applications_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     translations = relationship(
         "JobTranslation",
         back_populates="job",
@@ -64,4 +75,11 @@ class Job(Base):
         "Application",
         back_populates="job",
         passive_deletes=True,
-    )
\ No newline at end of file
+    )
+
+Index(
+    "ix_jobs_active_salary_id",
+    Job.is_active,
+    func.coalesce(Job.salary_from, 0),
+    Job.id,
+)
@@ -0,0 +1,136 @@
+from sqlalchemy import DDL, Index, event, func, text
+# registers the typed to_tsvector / websearch_to_tsquery functions
+import sqlalchemy.dialects.postgresql  # noqa: F401
+
+from database import Base
+from models.job import Job
+from models.job_translations import JobTranslation
+
+SEARCH_FIELDS = [
+    "title",
+    "short_description",
+    "full_description",
+    "requirements_text",
+    "benefits_text",
+]
+
+# Postgres text search configs per SUPPORTED_LANGS code; languages without a
+# snowball stemmer in stock Postgres fall back to "simple" (lowercase, no stemming)
+PG_SEARCH_CONFIGS = {
+    "en": "english",
+    "ru": "russian",
+    "lt": "lithuanian",
+    "lv": "simple",
+    "pl": "simple",
+    "ee": "simple",
+}
+
+# base job columns are written in English
+BASE_SEARCH_CONFIG = "english"
+
+
+def search_document(model):
+    # plain || keeps the expression IMMUTABLE so Postgres accepts it in an index
+    doc = None
+    for field in SEARCH_FIELDS:
+        part = func.coalesce(getattr(model, field), "")
+        doc = part if doc is None else doc.op("||")(" ").op("||")(part)
+    return doc
+
+
+def _regconfig(config: str):
+    # text() rather than literal_column() so Index() can still find the table
+    # from the column arguments that follow
+    return text(f"'{config}'::regconfig")
+
+
+def search_vector(model, config: str):
+    return func.to_tsvector(_regconfig(config), search_document(model))
+
+
+def search_query(config: str, q: str):
+    return func.websearch_to_tsquery(_regconfig(config), q)
+
+
+Index(
+    "ix_jobs_search",
+    search_vector(Job, BASE_SEARCH_CONFIG),
+    postgresql_using="gin",
+).ddl_if(dialect="postgresql")
+
+for _lang, _config in PG_SEARCH_CONFIGS.items():
+    Index(
+        f"ix_job_translations_search_{_lang}",
+        search_vector(JobTranslation, _config),
+        postgresql_using="gin",
+        postgresql_where=JobTranslation.lang_code == _lang,
+    ).ddl_if(dialect="postgresql")
+
+
+# --- SQLite FTS5 fallback (local development / tests) ---
+# one row per job (lang_code '') and per translation, kept in sync by triggers
+
+FTS_TABLE = "job_search_fts"
+
+
+def _sqlite_document(alias: str) -> str:
+    return " || ' ' || ".join(f"coalesce({alias}.{f}, '')" for f in SEARCH_FIELDS)
+
+
+_SQLITE_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        job_id UNINDEXED, lang_code UNINDEXED, body,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS jobs_fts_ai AFTER INSERT ON jobs BEGIN
+        INSERT INTO {FTS_TABLE} (job_id, lang_code, body) VALUES (new.id, '', {_sqlite_document("new")});
+    END
+    """,
+    # only the indexed columns, so counter and timestamp updates don't rewrite the FTS row;
+    # dropped first so databases with the older catch-all trigger pick this one up
+    "DROP TRIGGER IF EXISTS jobs_fts_au",
+    f"""
+    CREATE TRIGGER jobs_fts_au AFTER UPDATE OF {", ".join(SEARCH_FIELDS)} ON jobs BEGIN
+        DELETE FROM {FTS_TABLE} WHERE job_id = old.id AND lang_code = '';
+        INSERT INTO {FTS_TABLE} (job_id, lang_code, body) VALUES (new.id, '', {_sqlite_document("new")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS jobs_fts_ad AFTER DELETE ON jobs BEGIN
+        DELETE FROM {FTS_TABLE} WHERE job_id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS job_translations_fts_ai AFTER INSERT ON job_translations BEGIN
+        INSERT INTO {FTS_TABLE} (job_id, lang_code, body) VALUES (new.job_id, new.lang_code, {_sqlite_document("new")});
+    END
+    """,
+    "DROP TRIGGER IF EXISTS job_translations_fts_au",
+    f"""
+    CREATE TRIGGER job_translations_fts_au AFTER UPDATE OF job_id, lang_code, {", ".join(SEARCH_FIELDS)} ON job_translations BEGIN
+        DELETE FROM {FTS_TABLE} WHERE job_id = old.job_id AND lang_code = old.lang_code;
+        INSERT INTO {FTS_TABLE} (job_id, lang_code, body) VALUES (new.job_id, new.lang_code, {_sqlite_document("new")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS job_translations_fts_ad AFTER DELETE ON job_translations BEGIN
+        DELETE FROM {FTS_TABLE} WHERE job_id = old.job_id AND lang_code = old.lang_code;
+    END
+    """,
+    # rebuild so rows that existed before the triggers are indexed too
+    f"DELETE FROM {FTS_TABLE}",
+    f"""
+    INSERT INTO {FTS_TABLE} (job_id, lang_code, body)
+    SELECT j.id, '', {_sqlite_document("j")} FROM jobs j
+    """,
+    f"""
+    INSERT INTO {FTS_TABLE} (job_id, lang_code, body)
+    SELECT t.job_id, t.lang_code, {_sqlite_document("t")} FROM job_translations t
+    """,
+]
+
+for _stmt in _SQLITE_FTS_DDL:
+    event.listen(Base.metadata, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
+from datetime import datetime, timezone
+from database import Base
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+
+    # the worker polls pending rows that are due, oldest first
+    __table_args__ = (
+        Index("ix_outbox_status_available_id", "status", "available_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    topic = Column(String(64), nullable=False)
+    payload = Column(JSON, nullable=False)
+
+    status = Column(String(16), nullable=False, default="pending")  # pending / done / failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    available_at = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    processed_at = Column(DateTime, nullable=True)
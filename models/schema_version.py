@@ -0,0 +1,11 @@
+from database import Base
+from sqlalchemy import Column, Integer, String, DateTime, func
+
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+
+    # single row, id = 1
+    id = Column(Integer, primary_key=True)
+    version = Column(String(64), nullable=False)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
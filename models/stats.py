@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String
+from database import Base
+
+class StatCounter(Base):
+    __tablename__ = "stat_counters"
+
+    # e.g. ("applications_by_day", "2025-01-31"), ("applications_by_job", "42")
+    dimension = Column(String(32), primary_key=True)
+    bucket = Column(String(64), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, func
 from database import Base
 
 class User(Base):
@@ -23,6 +23,9 @@ class User(Base):
     userWorkExperience = Column(Text, nullable=True)
     userEmploymentStatus = Column(String(255), nullable=True)
     isAdmin = Column(Boolean, nullable=False, server_default="false")
+    # bumped to revoke previously issued tokens (carried as the "ver" claim)
+    tokenVersion = Column(Integer, nullable=False, server_default="0", default=0)
+    userCreatedAt = Column(DateTime(timezone=True), nullable=True, server_default=func.now())
 
     cv_s3_key = Column(String, nullable=True)
-    cv_original_name = Column(String, nullable=True)
\ No newline at end of file
+    cv_original_name = Column(String, nullable=True)
@@ -0,0 +1,28 @@
+import os
+import time
+
+import create_tables  # registers every model
+from database import SessionLocal
+from services.outbox import drain_once
+
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1.0"))
+
+def run():
+    print("Outbox worker started.")
+    while True:
+        db = SessionLocal()
+        try:
+            processed = drain_once(db)
+        except Exception as e:
+            db.rollback()
+            print("Outbox drain failed:", repr(e))
+            processed = 0
+        finally:
+            db.close()
+
+        # keep draining while there's a backlog, otherwise poll
+        if not processed:
+            time.sleep(OUTBOX_POLL_INTERVAL)
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,16 @@
+import create_tables  # registers every model
+from database import SessionLocal
+from services.stats import rebuild_stats, recount_applications
+
+def rebuild():
+    print("Rebuilding admin statistics and job applicant counts...")
+    db = SessionLocal()
+    try:
+        rebuild_stats(db)
+        recount_applications(db)
+    finally:
+        db.close()
+    print("Done.")
+
+if __name__ == "__main__":
+    rebuild()
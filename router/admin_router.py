@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
+from typing import Literal, Dict
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session, lazyload
+from sqlalchemy import select, update, delete
+from database import get_db, get_read_db
 from models.user import User
 from models.job import Job
 from models.job_translations import JobTranslation
@@ -13,7 +16,17 @@ from schemas.admin import (
     AdminJobBase, AdminJobCreate, AdminJobUpdate,
     JobTranslationUpsert, JobTranslationBase
 )
-from services.auth_deps import get_current_admin
+from services.auth_deps import get_current_admin, invalidate_user
+from services.db_pool import pool_snapshot
+from services.security import password_hasher
+from services.fast_json import fast_response
+from services.metrics import query_budget
+from services.stats import application_buckets, bump_applications_count, bump_stats, load_stats
+from router.jobs_router_utils import SUPPORTED_LANGS, invalidate_job_render
+from router.admin_router_utils import (
+    USER_LIST_COLUMNS, filter_users, stream_users_export, parse_import_rows, import_jobs,
+    upsert_translations,
+)
 
 admin_router = APIRouter()
 
@@ -21,11 +34,54 @@ admin_router = APIRouter()
 
 @admin_router.get("/users", response_model=list[AdminUserBase])
 def list_users(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: Session = Depends(get_read_db),
+    _: User = Depends(get_current_admin),
+    email_prefix: str | None = Query(None),
+    citizenship: str | None = Query(None),
+    employment_status: str | None = Query(None),
+    has_cv: bool | None = Query(None),
+    cursor: int | None = Query(None, description="userId of the last row of the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+):
+    q = filter_users(
+        select(*USER_LIST_COLUMNS),
+        email_prefix=email_prefix,
+        citizenship=citizenship,
+        employment_status=employment_status,
+        has_cv=has_cv,
+    )
+    if cursor is not None:
+        q = q.where(User.userId > cursor)
+
+    rows = db.execute(q.order_by(User.userId.asc()).limit(limit + 1)).mappings().all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1]["userId"])
+    return fast_response(rows, list[AdminUserBase], response=response)
+
+
+@admin_router.get("/users/export")
+def export_users(
     _: User = Depends(get_current_admin),
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    email_prefix: str | None = Query(None),
+    citizenship: str | None = Query(None),
+    employment_status: str | None = Query(None),
+    has_cv: bool | None = Query(None),
 ):
-    rows = db.execute(select(User)).scalars().all()
-    return rows
+    filters = {
+        "email_prefix": email_prefix,
+        "citizenship": citizenship,
+        "employment_status": employment_status,
+        "has_cv": has_cv,
+    }
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_users_export(format, filters),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
 
 
 @admin_router.get("/users/{user_id}")
@@ -95,12 +151,16 @@ def admin_update_user(
 
     for field, value in data.items():
         if field == "is_admin":
+            if value != user.isAdmin:
+                # role change: tokens issued with the old isAdmin claim stop working
+                user.tokenVersion = (user.tokenVersion or 0) + 1
             user.isAdmin = value
         else:
             setattr(user, field, value)
 
     db.add(user)
     db.commit()
+    invalidate_user(user_id)
     db.refresh(user)
     return user
 
@@ -125,7 +185,7 @@ def list_user_applications(
         .order_by(Application.created_at.desc())
     )
     rows = db.execute(q).all()
-    return [
+    return fast_response([
         {
             "id": r.id,
             "status": r.status,
@@ -135,7 +195,7 @@ def list_user_applications(
             "job_country": r.job_country,
         }
         for r in rows
-    ]
+    ])
 
 @admin_router.delete("/users/{user_id}", status_code=204)
 def admin_delete_user(
@@ -146,18 +206,32 @@ def admin_delete_user(
     if not user:
         raise HTTPException(status_code=404, detail="User not found.")
 
+    # cascade the user's applications by hand so the job/stat counters follow
+    apps = db.execute(
+        select(Application, Job)
+        .join(Job, Job.id == Application.job_id)
+        .where(Application.user_id == user_id)
+    ).all()
+    if apps:
+        bump_stats(db, [b for app, job in apps for b in application_buckets(app, job.country)], -1)
+        bump_applications_count(db, [job.id for _, job in apps], -1)
+        db.execute(delete(Application).where(Application.user_id == user_id))
+
     db.delete(user)
     db.commit()
+    invalidate_user(user_id)
     return Response(status_code=204)
 
 # --- Jobs ---
 
 @admin_router.get("/jobs", response_model=list[AdminJobBase])
 def admin_list_jobs(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _: User = Depends(get_current_admin),
 ):
-    return db.execute(select(Job)).scalars().all()
+    # AdminJobBase has no translations, skip the selectin load
+    jobs = db.execute(select(Job).options(lazyload(Job.translations))).scalars().all()
+    return fast_response(jobs, list[AdminJobBase])
 
 
 @admin_router.post("/jobs", response_model=AdminJobBase, status_code=201)
@@ -177,6 +251,22 @@ def admin_create_job(
     return job
 
 
+# statement count grows with the file (a few per IMPORT_BATCH_SIZE rows), so no budget
+@admin_router.post("/jobs/import", dependencies=[Depends(query_budget(0))])
+def admin_import_jobs(
+    file: UploadFile = File(...),
+    format: Literal["csv", "ndjson"] | None = Query(None),
+    db: Session = Depends(get_db),
+    _: User = Depends(get_current_admin),
+):
+    fmt = format
+    if fmt is None:
+        name = (file.filename or "").lower()
+        fmt = "ndjson" if name.endswith((".ndjson", ".jsonl")) else "csv"
+
+    return import_jobs(db, parse_import_rows(file.file, fmt))
+
+
 @admin_router.put("/jobs/{job_id}", response_model=AdminJobBase)
 def admin_update_job(
     job_id: int,
@@ -193,6 +283,7 @@ def admin_update_job(
 
     db.add(job)
     db.commit()
+    invalidate_job_render(job_id)
     db.refresh(job)
     return job
 
@@ -222,10 +313,17 @@ def delete_job(
     if not job:
         raise HTTPException(status_code=404, detail="Job not found.")
 
+    # cascade the job's applications by hand so the stat counters follow
+    apps = db.execute(select(Application).where(Application.job_id == job_id)).scalars().all()
+    if apps:
+        bump_stats(db, [b for app in apps for b in application_buckets(app, job.country)], -1)
+        db.execute(delete(Application).where(Application.job_id == job_id))
+
     db.delete(job)
     db.commit()
+    invalidate_job_render(job_id)
 
-    # DB will cascade delete job_translations + applications
+    # DB will cascade delete job_translations
     return Response(status_code=204)
 
 # --- Translations ---
@@ -246,7 +344,44 @@ def get_job_translations(
         .scalars()
         .all()
     )
-    return rows
+    return fast_response(rows, list[JobTranslationBase])
+
+
+@admin_router.put("/jobs/{job_id}/translations")
+def upsert_job_translations(
+    job_id: int,
+    payload: Dict[str, JobTranslationUpsert],
+    db: Session = Depends(get_db),
+    _: User = Depends(get_current_admin),
+):
+    rows = {}
+    for lang_code, tr in payload.items():
+        lang = lang_code.lower()
+        if lang not in SUPPORTED_LANGS:
+            raise HTTPException(status_code=400, detail=f"Unsupported language: {lang_code}")
+        rows[lang] = {
+            **tr.dict(exclude_unset=True, exclude={"lang_code"}),
+            "job_id": job_id,
+            "lang_code": lang,
+        }
+
+    # bumping updated_at doubles as the existence check and moves the job's version once
+    bumped = db.execute(
+        update(Job)
+        .where(Job.id == job_id)
+        .values(updated_at=datetime.now(timezone.utc))
+        .returning(Job.id)
+    ).scalar_one_or_none()
+    if bumped is None:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if rows:
+        upsert_translations(db, list(rows.values()))
+
+    db.commit()
+    invalidate_job_render(job_id)
+    return {"status": "ok", "langs": sorted(rows)}
 
 
 @admin_router.put("/jobs/{job_id}/translations/{lang_code}")
@@ -276,6 +411,11 @@ def upsert_job_translation(
     data = payload.dict(exclude_unset=True)
     data["lang_code"] = lang
     data["job_id"] = job_id
+    # set from Python (server now() is whole seconds on SQLite) and moved on the job too,
+    # so the job's ETag and every worker's render cache key change with each edit
+    now = datetime.now(timezone.utc)
+    data["updated_at"] = now
+    job.updated_at = now
 
     if tr:
         for k, v in data.items():
@@ -285,5 +425,32 @@ def upsert_job_translation(
         db.add(tr)
 
     db.commit()
+    invalidate_job_render(job_id)
     db.refresh(tr)
     return {"status": "ok"}
+
+# --- Stats ---
+
+@admin_router.get("/stats")
+def admin_stats(
+    days: int = Query(30, ge=1, le=366),
+    top_jobs: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+    _: User = Depends(get_current_admin),
+):
+    return load_stats(db, days=days, top_jobs=top_jobs)
+
+# --- Metrics ---
+
+@admin_router.get("/metrics/pool")
+def db_pool_metrics(
+    _: User = Depends(get_current_admin),
+):
+    return {"pools": pool_snapshot()}
+
+
+@admin_router.get("/metrics/hashing")
+def password_hashing_metrics(
+    _: User = Depends(get_current_admin),
+):
+    return password_hasher.snapshot()
@@ -0,0 +1,275 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from itertools import groupby
+
+from pydantic import ValidationError
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import SessionLocal, dialect_insert
+from models.user import User
+from models.job import Job
+from models.job_translations import JobTranslation
+from schemas.admin import AdminJobImportRow
+from router.jobs_router_utils import SUPPORTED_LANGS, invalidate_job_render
+
+# AdminUserBase fields only, so list pages never load the Text profile columns
+USER_LIST_COLUMNS = [
+    User.userId,
+    User.userEmail,
+    User.userName,
+    User.userSurname,
+    User.userPhoneNumber,
+    User.userCitizenship,
+    User.userEmploymentStatus,
+    User.isAdmin,
+]
+
+USER_EXPORT_COLUMNS = [
+    User.userId,
+    User.userEmail,
+    User.userName,
+    User.userSurname,
+    User.userAge,
+    User.userGender,
+    User.userPhoneNumber,
+    User.userCitizenship,
+    User.userEmploymentStatus,
+    User.userPrefferedJob,
+    User.userSecondPrefferedJob,
+    User.userPrefferedJobLocation,
+    User.userSecondPrefferedJobLocation,
+    User.userTellAboutYourSelf,
+    (User.cv_s3_key.isnot(None)).label("has_cv"),
+    User.cv_original_name,
+]
+
+EXPORT_BATCH_SIZE = 1000
+
+def filter_users(
+    q,
+    *,
+    email_prefix: str | None = None,
+    citizenship: str | None = None,
+    employment_status: str | None = None,
+    has_cv: bool | None = None,
+):
+    if email_prefix:
+        q = q.where(User.userEmail.startswith(email_prefix.lower().strip(), autoescape=True))
+    if citizenship:
+        q = q.where(User.userCitizenship == citizenship)
+    if employment_status:
+        q = q.where(User.userEmploymentStatus == employment_status)
+    if has_cv is not None:
+        q = q.where(User.cv_s3_key.isnot(None) if has_cv else User.cv_s3_key.is_(None))
+    return q
+
+
+def stream_users_export(fmt: str, filters: dict):
+    # runs after the request's own session is gone, so it opens its own;
+    # yield_per keeps a server-side cursor and only one batch in memory
+    q = filter_users(select(*USER_EXPORT_COLUMNS), **filters).order_by(User.userId.asc())
+    header = [c.key for c in USER_EXPORT_COLUMNS]
+
+    with SessionLocal() as db:
+        result = db.execute(q.execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+        if fmt == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(header)
+            for batch in result.partitions():
+                writer.writerows(batch)
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate(0)
+            yield buf.getvalue()
+        else:
+            for batch in result.partitions():
+                yield "".join(
+                    json.dumps(dict(zip(header, row)), ensure_ascii=False) + "\n"
+                    for row in batch
+                )
+
+
+# --- Bulk job import ---
+
+IMPORT_BATCH_SIZE = 500
+
+# rows are partial (AdminJobUpdate-shaped), so the NOT NULL columns are only checked for new jobs
+JOB_REQUIRED_ON_CREATE = ("title", "country", "category", "short_description", "full_description")
+
+
+def parse_import_rows(fileobj, fmt: str):
+    # yields (row number, raw dict or parse error); blank CSV cells count as "not provided"
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        for n, row in enumerate(csv.DictReader(text), start=1):
+            data = {k: v for k, v in row.items() if k and v not in (None, "")}
+            if "translations" in data:
+                try:
+                    data["translations"] = json.loads(data["translations"])
+                except ValueError as e:
+                    yield n, ValueError(f"translations is not valid JSON: {e}")
+                    continue
+            yield n, data
+    else:
+        n = 0
+        for line in text:
+            if not line.strip():
+                continue
+            n += 1
+            try:
+                data = json.loads(line)
+                if not isinstance(data, dict):
+                    raise ValueError("expected a JSON object")
+            except ValueError as e:
+                yield n, ValueError(f"invalid JSON: {e}")
+                continue
+            yield n, data
+
+
+def upsert_translations(db, rows: list[dict]) -> None:
+    # rows: dicts with job_id, lang_code and the fields to set; one statement per column set
+    insert = dialect_insert(db)
+    keyfunc = lambda r: tuple(sorted(r))
+    for keys, group in groupby(sorted(rows, key=keyfunc), key=keyfunc):
+        stmt = insert(JobTranslation)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[JobTranslation.job_id, JobTranslation.lang_code],
+            set_={
+                **{k: stmt.excluded[k] for k in keys if k not in ("job_id", "lang_code")},
+                "updated_at": func.now(),
+            },
+        )
+        db.execute(stmt, list(group))
+
+
+def _import_batch(db, batch: list[tuple[int, dict]], seen_refs: set, report: list) -> None:
+    valid = []
+    for n, raw in batch:
+        if isinstance(raw, Exception):
+            report.append({"row": n, "status": "error", "error": str(raw)})
+            continue
+        try:
+            row = AdminJobImportRow(**raw)
+        except ValidationError as e:
+            report.append({
+                "row": n,
+                "reference_code": raw.get("reference_code"),
+                "status": "error",
+                "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()),
+            })
+            continue
+
+        ref = row.reference_code
+        if ref is not None:
+            # one statement can't upsert the same key twice
+            if ref in seen_refs:
+                report.append({"row": n, "reference_code": ref, "status": "error", "error": "duplicate reference_code in import"})
+                continue
+            seen_refs.add(ref)
+
+        bad_langs = [l for l in (row.translations or {}) if l.lower() not in SUPPORTED_LANGS]
+        if bad_langs:
+            report.append({"row": n, "reference_code": ref, "status": "error", "error": f"unsupported languages: {', '.join(bad_langs)}"})
+            continue
+
+        valid.append((n, row))
+
+    # one round trip to split the batch into updates (by primary key) and inserts
+    refs = [row.reference_code for _, row in valid if row.reference_code is not None]
+    existing = dict(
+        db.execute(select(Job.reference_code, Job.id).where(Job.reference_code.in_(refs))).all()
+    ) if refs else {}
+
+    pending = []
+    for n, row in valid:
+        if row.reference_code not in existing:
+            missing = [f for f in JOB_REQUIRED_ON_CREATE if getattr(row, f) is None]
+            if missing:
+                report.append({"row": n, "reference_code": row.reference_code, "status": "error", "error": f"missing required fields: {', '.join(missing)}"})
+                continue
+        data = row.dict(exclude_unset=True, exclude={"translations"})
+        pending.append((n, row, data))
+
+    if not pending:
+        return
+
+    insert = dialect_insert(db)
+    now = datetime.now(timezone.utc)
+    job_ids = {}
+    updates = []
+    inserts = []
+    for n, row, data in pending:
+        if row.reference_code in existing:
+            job_ids[n] = existing[row.reference_code]
+            updates.append({**data, "id": job_ids[n], "updated_at": now})
+        else:
+            inserts.append((n, row, data))
+
+    keyfunc = lambda item: tuple(sorted(item[2]))
+    try:
+        if updates:
+            # ORM bulk UPDATE by primary key: executemany, grouped by column set
+            db.execute(update(Job), updates)
+
+        for keys, group in groupby(sorted(inserts, key=keyfunc), key=keyfunc):
+            group = list(group)
+            # ON CONFLICT covers a row created concurrently since the lookup above
+            stmt = insert(Job)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Job.reference_code],
+                set_={
+                    **{k: stmt.excluded[k] for k in keys if k != "reference_code"},
+                    "updated_at": now,
+                },
+            ).returning(Job.id, sort_by_parameter_order=True)
+            ids = db.execute(stmt, [data for _, _, data in group]).scalars().all()
+            for (n, _, _), job_id in zip(group, ids):
+                job_ids[n] = job_id
+
+        translations = [
+            {**tr.dict(exclude_unset=True, exclude={"lang_code"}), "job_id": job_ids[n], "lang_code": lang.lower()}
+            for n, row, _ in pending
+            for lang, tr in (row.translations or {}).items()
+        ]
+        if translations:
+            upsert_translations(db, translations)
+
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        for n, row, _ in pending:
+            report.append({"row": n, "reference_code": row.reference_code, "status": "error", "error": f"database error: {e.__class__.__name__}"})
+        return
+
+    invalidate_job_render(*job_ids.values())
+    for n, row, _ in pending:
+        report.append({
+            "row": n,
+            "reference_code": row.reference_code,
+            "status": "updated" if row.reference_code in existing else "created",
+            "job_id": job_ids[n],
+        })
+
+
+def import_jobs(db, rows) -> dict:
+    report = []
+    seen_refs = set()
+    batch = []
+    for item in rows:
+        batch.append(item)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            _import_batch(db, batch, seen_refs, report)
+            batch = []
+    if batch:
+        _import_batch(db, batch, seen_refs, report)
+
+    report.sort(key=lambda r: r["row"])
+    counts = {"created": 0, "updated": 0, "error": 0}
+    for r in report:
+        counts[r["status"]] += 1
+    return {"total": len(report), **counts, "rows": report}
@@ -1,76 +1,181 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy import select
+import os
+from datetime import datetime, timezone
 
-from database import get_db
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Response
+from sqlalchemy.orm import Session, contains_eager, lazyload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import literal, select
+
+from database import get_db, get_async_db, dialect_insert
 from models.application import Application
 from models.job import Job
 from models.user import User
-from schemas.application import ApplicationCreate, ApplicationOut, ApplicationWithJobOut
-from services.auth_deps import get_current_user
+from schemas.application import (
+    ApplicationCreate, ApplicationOut, ApplicationWithJobOut,
+    ApplicationBatchCreate, ApplicationBatchResult,
+)
+from services.auth_deps import Principal, get_current_principal
+from services.cache import LRUCache
+from services.fast_json import fast_response
+from services.stats import application_buckets, bump_applications_count, bump_stats
 
 application_router = APIRouter()
 
+# (userId, Idempotency-Key) -> (job_id, response body) of a successful submission
+_idempotent_responses = LRUCache(
+    int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("IDEMPOTENCY_TTL", "86400")),
+)
+
 
 @application_router.post("", response_model=ApplicationOut, status_code=status.HTTP_201_CREATED)
 def create_application(
     payload: ApplicationCreate,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key", max_length=255),
 ):
-    job = db.query(Job).filter(Job.id == payload.job_id, Job.is_active == True).first()
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found or inactive")
-
-    # either rely on unique constraint or pre-check:
-    existing = (
-        db.query(Application)
-        .filter(
-            Application.user_id == current_user.userId,
-            Application.job_id == payload.job_id,
+    cache_key = (current_user.userId, idempotency_key)
+    if idempotency_key:
+        replay = _idempotent_responses.get(cache_key)
+        if replay is not None:
+            job_id, body = replay
+            if job_id != payload.job_id:
+                raise HTTPException(
+                    status_code=422,
+                    detail="Idempotency-Key was already used for a different request.",
+                )
+            response.headers["Idempotent-Replayed"] = "true"
+            return body
+
+    # job check, user check, duplicate check and insert in one statement: no row back means
+    # the job is missing/inactive, the user is gone or the user already applied
+    insert = dialect_insert(db)
+    source = (
+        select(
+            User.userId,
+            Job.id,
+            literal("applied"),
+            literal(datetime.now(timezone.utc)),
         )
-        .first()
+        .select_from(Job)
+        .join(User, User.userId == current_user.userId)
+        .where(Job.id == payload.job_id, Job.is_active == True)
     )
-    if existing:
-        raise HTTPException(
-            status_code=400,
-            detail="You already applied for this job",
-        )
-
-    app = Application(
-        user_id=current_user.userId,
-        job_id=payload.job_id,
-        status="applied",
+    stmt = (
+        insert(Application)
+        .from_select(["user_id", "job_id", "status", "created_at"], source)
+        .on_conflict_do_nothing(index_elements=[Application.user_id, Application.job_id])
+        .returning(Application.id, Application.job_id, Application.status, Application.created_at)
     )
+    app = db.execute(stmt).one_or_none()
 
-    db.add(app)
-    try:
-        db.commit()
-    except IntegrityError:
+    if app is None:
         db.rollback()
+        job_active = db.execute(
+            select(Job.id).where(Job.id == payload.job_id, Job.is_active == True)
+        ).scalar_one_or_none()
+        if job_active is None:
+            raise HTTPException(status_code=404, detail="Job not found or inactive")
+
+        existing = db.execute(
+            select(Application.id, Application.job_id, Application.status, Application.created_at)
+            .where(Application.user_id == current_user.userId, Application.job_id == payload.job_id)
+        ).one_or_none()
+        if existing is None:
+            # deleted since the token was issued
+            raise HTTPException(status_code=401, detail="Could not validate credentials")
+        if idempotency_key:
+            # a retry that landed on another worker, or a double tap whose first request
+            # committed while this one waited on the unique key: replay the stored row
+            body = ApplicationOut.model_validate(existing).model_dump()
+            _idempotent_responses.set(cache_key, (payload.job_id, body))
+            response.headers["Idempotent-Replayed"] = "true"
+            return body
         raise HTTPException(
             status_code=400,
             detail="You already applied for this job",
         )
 
-    db.refresh(app)
-    return app
+    country = select(Job.country).where(Job.id == app.job_id).scalar_subquery()
+    bump_stats(db, application_buckets(app, country))
+    bump_applications_count(db, [app.job_id])
+    db.commit()
+
+    body = ApplicationOut.model_validate(app).model_dump()
+    if idempotency_key:
+        _idempotent_responses.set(cache_key, (payload.job_id, body))
+    return body
+
+
+@application_router.post("/batch", response_model=list[ApplicationBatchResult])
+def create_applications_batch(
+    payload: ApplicationBatchCreate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    job_ids = list(dict.fromkeys(payload.job_ids))
+
+    countries = dict(db.execute(
+        select(Job.id, Job.country).where(Job.id.in_(job_ids), Job.is_active == True)
+    ).all())
+
+    created = {}
+    if countries:
+        insert = dialect_insert(db)
+        # joined with users, so a user deleted since the token was issued inserts nothing
+        source = (
+            select(User.userId, Job.id, literal("applied"), literal(datetime.now(timezone.utc)))
+            .select_from(Job)
+            .join(User, User.userId == current_user.userId)
+            .where(Job.id.in_(list(countries)))
+        )
+        stmt = (
+            insert(Application)
+            .from_select(["user_id", "job_id", "status", "created_at"], source)
+            .on_conflict_do_nothing(index_elements=[Application.user_id, Application.job_id])
+            .returning(Application.id, Application.job_id, Application.status, Application.created_at)
+        )
+        created = {app.job_id: app for app in db.execute(stmt).all()}
+        if not created and db.execute(select(User.userId).where(User.userId == current_user.userId)).scalar_one_or_none() is None:
+            db.rollback()
+            raise HTTPException(status_code=401, detail="Could not validate credentials")
+
+    if created:
+        bump_stats(db, [
+            b for app in created.values()
+            for b in application_buckets(app, countries[app.job_id])
+        ])
+        bump_applications_count(db, list(created))
+        db.commit()
+
+    results = []
+    for job_id in job_ids:
+        if job_id in created:
+            results.append({"job_id": job_id, "outcome": "created", "application": created[job_id]})
+        elif job_id in countries:
+            results.append({"job_id": job_id, "outcome": "already_applied"})
+        else:
+            results.append({"job_id": job_id, "outcome": "inactive"})
+    return fast_response(results, list[ApplicationBatchResult])
 
 
 @application_router.get("/me", response_model=list[ApplicationWithJobOut])
-def get_my_applications(
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user),
+async def get_my_applications(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    apps = (
-        db.query(Application)
+    result = await db.execute(
+        select(Application)
         .join(Job, Job.id == Application.job_id)
-        .filter(Application.user_id == current_user.userId)
+        # fill Application.job from the join, async sessions can't lazy load;
+        # translations aren't part of ApplicationWithJobOut
+        .options(contains_eager(Application.job).options(lazyload(Job.translations)))
+        .where(Application.user_id == current_user.userId)
         .order_by(Application.created_at.desc())
-        .all()
     )
-    return apps
+    return fast_response(result.scalars().all(), list[ApplicationWithJobOut])
 
 @application_router.delete(
     "/me/{app_id}",
@@ -78,7 +183,7 @@ def get_my_applications(
 )
 def delete_my_application(
     app_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     app = (
@@ -94,6 +199,10 @@ def delete_my_application(
     if not app:
         raise HTTPException(status_code=404, detail="Application not found.")
 
+    job = db.get(Job, app.job_id)
+    if job:
+        bump_stats(db, application_buckets(app, job.country), -1)
+        bump_applications_count(db, [job.id], -1)
     db.delete(app)
     db.commit()
-    return Response(status_code=204)
\ No newline at end of file
+    return Response(status_code=204)
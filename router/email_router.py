@@ -1,31 +1,39 @@
 # routers/email.py
 from fastapi import APIRouter, Depends, status
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 
-from database import get_db
+from database import get_db, dialect_insert
 from models.email import EmailContact
 from schemas.email import EmailContactCreate, EmailContactResponse
+from services.outbox import EMAIL_CONTACT_SUBMITTED, enqueue
 
 email_router = APIRouter()
 
 @email_router.post(
     "/add",
     response_model=EmailContactResponse,
-    status_code=status.HTTP_201_CREATED
+    status_code=status.HTTP_202_ACCEPTED
 )
 def create_email_contact(
     payload: EmailContactCreate,
     db: Session = Depends(get_db)
 ):
-    contact_info = EmailContact(
-        userEmail=payload.userEmail,
-        message=payload.message
-    )
+    # repeat submissions from the same address append to the stored message
+    insert = dialect_insert(db)
+    stmt = insert(EmailContact).values(userEmail=payload.userEmail, message=payload.message)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[EmailContact.userEmail],
+        set_={"message": func.coalesce(EmailContact.message + "\n\n", "") + stmt.excluded.message},
+    ).returning(EmailContact.id)
+    contact_id = db.execute(stmt).scalar_one()
 
-    db.add(contact_info)
+    # notification happens in outbox_worker.py, off the request path
+    enqueue(db, EMAIL_CONTACT_SUBMITTED, {
+        "contact_id": contact_id,
+        "userEmail": payload.userEmail,
+        "message": payload.message,
+    })
     db.commit()
-    db.refresh(contact_info)
 
-    print(payload.message)
-
-    return contact_info
+    return {"id": contact_id, "userEmail": payload.userEmail, "message": payload.message}
@@ -1,52 +1,135 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Literal
 
-from database import get_db
+from database import get_async_read_db
 from models.job import Job
+from models.job_translations import JobTranslation
 from schemas.job import JobOut
 
-from .jobs_router_utils import job_to_dict, resolve_lang
+from services.http_cache import is_not_modified, not_modified, set_cache_headers
+from services.fast_json import FAST_JSON, fast_response, dump_trusted
+from services.compression import CachedBody
+from .jobs_router_utils import (
+    job_to_dict, resolve_lang, active_jobs_query, encode_cursor,
+    listing_version, job_version, search_jobs,
+    listing_cache_key, get_cached_listing, cache_listing,
+)
 
 jobs_router = APIRouter()
 
+MAX_PAGE_SIZE = 100
+
+# "ByCategory" is kept as an alias so existing clients keep working
 @jobs_router.get("", response_model=List[JobOut])
-def list_jobs(
-    db: Session = Depends(get_db),
+@jobs_router.get("ByCategory", response_model=List[JobOut])
+async def list_jobs(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
     country: str | None = Query(None),
+    category: str | None = Query(None),
+    employment_type: str | None = Query(None),
+    shift_type: str | None = Query(None),
+    housing_provided: bool | None = Query(None),
+    transport_provided: bool | None = Query(None),
+    salary_min: float | None = Query(None, ge=0),
+    salary_max: float | None = Query(None, ge=0),
+    sort: Literal["newest", "salary", "popularity"] = Query("newest"),
+    cursor: str | None = Query(None),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
     lang: str | None = Query(None),
 ):
-    q = select(Job).where(Job.is_active == True)
-    if country:
-        q = q.where(Job.country == country.upper())
-
-    jobs = db.execute(q).scalars().all()
     lang_resolved = resolve_lang(lang)
-    return [job_to_dict(j, lang_resolved) for j in jobs]
 
-@jobs_router.get("ByCategory", response_model=List[JobOut])
-def list_jobs(
-    db: Session = Depends(get_db),
-    category: str | None = Query(None),
+    try:
+        q = active_jobs_query(
+            lang_resolved,
+            sort=sort,
+            country=country,
+            category=category,
+            employment_type=employment_type,
+            shift_type=shift_type,
+            housing_provided=housing_provided,
+            transport_provided=transport_provided,
+            salary_min=salary_min,
+            salary_max=salary_max,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    etag, last_modified = await listing_version(db, q, limit, lang_resolved)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(request, etag, last_modified)
+    set_cache_headers(response, etag, last_modified)
+
+    # hot pages are loaded, encoded and compressed once per version
+    key = listing_cache_key(request, etag)
+    page = get_cached_listing(key) if FAST_JSON else None
+    if page is None:
+        headers = {}
+        # one extra row tells us whether there is a next page
+        rows = (await db.execute(q.limit(limit + 1))).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            headers["X-Next-Cursor"] = encode_cursor(sort, last.sort_key, last.Job.id)
+
+        items = [job_to_dict(r.Job, lang_resolved) for r in rows]
+        if not FAST_JSON:
+            # kill switch: regular response_model validation, no cached body
+            response.headers.update(headers)
+            response.headers["Vary"] = "Accept-Encoding"
+            return items
+
+        # job_to_dict output already has the JobOut shape, so it skips re-validation
+        page = CachedBody(dump_trusted(items), headers)
+        cache_listing(key, page)
+
+    return page.response(request, response)
+
+@jobs_router.get("/search", response_model=List[JobOut])
+async def search_jobs_route(
+    q: str = Query(..., min_length=2, max_length=200),
     lang: str | None = Query(None),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    q = select(Job).where(Job.is_active == True)
-    if category:
-        q = q.where(Job.category == category.upper())
+    if not q.strip():
+        return []
 
-    jobs = db.execute(q).scalars().all()
     lang_resolved = resolve_lang(lang)
-    return [job_to_dict(j, lang_resolved) for j in jobs]
+    jobs = await search_jobs(db, q.strip(), lang_resolved, limit, offset)
+    return fast_response([job_to_dict(j, lang_resolved) for j in jobs])
 
 @jobs_router.get("/{job_id}", response_model=JobOut)
-def get_job(
+async def get_job(
     job_id: int,
+    request: Request,
+    response: Response,
     lang: str | None = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    job = db.get(Job, job_id)
+    lang_resolved = resolve_lang(lang)
+
+    version = await job_version(db, job_id, lang_resolved)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    etag, last_modified = version
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(request, etag, last_modified)
+    set_cache_headers(response, etag, last_modified)
+
+    job = await db.get(
+        Job,
+        job_id,
+        options=[selectinload(Job.translations.and_(JobTranslation.lang_code == lang_resolved))],
+    )
     if not job or not job.is_active:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    return job_to_dict(job, resolve_lang(lang))
+    return fast_response(job_to_dict(job, lang_resolved), response=response)
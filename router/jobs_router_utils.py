@@ -1,8 +1,30 @@
+import base64
+import json
+import os
+from datetime import datetime
+
+from sqlalchemy import column, func, literal_column, select, table, tuple_, union_all
+from sqlalchemy.orm import selectinload
+
 from models.job import Job
 from models.job_translations import JobTranslation
+from models.job_search import (
+    BASE_SEARCH_CONFIG, FTS_TABLE, PG_SEARCH_CONFIGS, search_query, search_vector,
+)
+from services.cache import LRUCache
+from services.http_cache import make_etag, latest
 
 SUPPORTED_LANGS = {"en", "lv", "lt", "pl", "ru", "ee"}
 
+JOB_SORTS = ("newest", "salary", "popularity")
+
+# rendered job payloads, keyed on (job id, lang, job version, translation version)
+_render_cache = LRUCache(int(os.getenv("JOB_RENDER_CACHE_SIZE", "4096")))
+
+# encoded listing pages (with their compressed variants), keyed on the request's query and
+# its listing ETag, so any job/translation change simply moves lookups to a new key
+_listing_cache = LRUCache(int(os.getenv("JOB_LISTING_CACHE_SIZE", "512")))
+
 def resolve_lang(lang: str | None) -> str:
     if not lang:
         return "en"
@@ -22,6 +44,210 @@ TRANSLATABLE_FIELDS = [
     "language_required",
 ]
 
+def job_sort_key(sort: str):
+    # every sort is descending and tie-broken on Job.id, so (key, id) is a stable keyset
+    if sort == "salary":
+        return func.coalesce(Job.salary_from, 0)
+    if sort == "popularity":
+        return Job.applications_count
+    return Job.created_at
+
+
+def encode_cursor(sort: str, key, job_id: int) -> str:
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    raw = json.dumps({"s": sort, "k": key, "id": job_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if data["s"] != sort:
+            raise ValueError("cursor belongs to another sort order")
+        key = data["k"]
+        if sort == "newest":
+            key = datetime.fromisoformat(key)
+        return key, int(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def active_jobs_query(
+    lang: str,
+    *,
+    sort: str = "newest",
+    country: str | None = None,
+    category: str | None = None,
+    employment_type: str | None = None,
+    shift_type: str | None = None,
+    housing_provided: bool | None = None,
+    transport_provided: bool | None = None,
+    salary_min: float | None = None,
+    salary_max: float | None = None,
+    cursor: str | None = None,
+):
+    key = job_sort_key(sort)
+
+    q = (
+        select(Job, key.label("sort_key"))
+        .where(Job.is_active == True)
+        # only pull the translation we are going to render
+        .options(selectinload(Job.translations.and_(JobTranslation.lang_code == lang)))
+    )
+
+    if country:
+        q = q.where(Job.country == country.upper())
+    if category:
+        q = q.where(Job.category == category.upper())
+    if employment_type:
+        q = q.where(Job.employment_type == employment_type)
+    if shift_type:
+        q = q.where(Job.shift_type == shift_type)
+    if housing_provided is not None:
+        q = q.where(Job.housing_provided == housing_provided)
+    if transport_provided is not None:
+        q = q.where(Job.transport_provided == transport_provided)
+    if salary_min is not None:
+        q = q.where(func.coalesce(Job.salary_to, Job.salary_from) >= salary_min)
+    if salary_max is not None:
+        q = q.where(func.coalesce(Job.salary_from, Job.salary_to) <= salary_max)
+
+    if cursor:
+        last_key, last_id = decode_cursor(cursor, sort)
+        q = q.where(tuple_(key, Job.id) < tuple_(last_key, last_id))
+
+    return q.order_by(key.desc(), Job.id.desc())
+
+
+def _pg_search_ids(q: str, lang: str):
+    base_q = search_query(BASE_SEARCH_CONFIG, q)
+    base_vec = search_vector(Job, BASE_SEARCH_CONFIG)
+    tr_q = search_query(PG_SEARCH_CONFIGS[lang], q)
+    tr_vec = search_vector(JobTranslation, PG_SEARCH_CONFIGS[lang])
+
+    hits = union_all(
+        select(Job.id.label("job_id"), func.ts_rank(base_vec, base_q).label("rank"))
+        .where(Job.is_active == True, base_vec.op("@@")(base_q)),
+        select(JobTranslation.job_id, func.ts_rank(tr_vec, tr_q).label("rank"))
+        .join(Job, Job.id == JobTranslation.job_id)
+        .where(
+            Job.is_active == True,
+            JobTranslation.lang_code == lang,
+            tr_vec.op("@@")(tr_q),
+        ),
+    ).subquery()
+    return hits
+
+
+def _sqlite_search_ids(q: str, lang: str):
+    fts = table(FTS_TABLE, column("job_id"), column("lang_code"))
+    # quote every term so user input can't use FTS5 query syntax; terms are ANDed
+    match = " ".join('"' + term.replace('"', '""') + '"' for term in q.split())
+
+    return (
+        select(fts.c.job_id, (-func.bm25(literal_column(FTS_TABLE))).label("rank"))
+        .join(Job, Job.id == fts.c.job_id)
+        .where(
+            Job.is_active == True,
+            literal_column(FTS_TABLE).op("MATCH")(match),
+            fts.c.lang_code.in_(["", lang]),
+        )
+        # bm25() only works on the FTS scan itself, so keep SQLite from
+        # flattening it into the outer GROUP BY
+        .cte("fts_hits")
+        .prefix_with("MATERIALIZED")
+    )
+
+
+async def search_jobs(db, q: str, lang: str, limit: int, offset: int) -> list[Job]:
+    if db.bind.dialect.name == "postgresql":
+        hits = _pg_search_ids(q, lang)
+    else:
+        hits = _sqlite_search_ids(q, lang)
+
+    rank = func.max(hits.c.rank)
+    ids = (await db.execute(
+        select(hits.c.job_id)
+        .group_by(hits.c.job_id)
+        .order_by(rank.desc(), hits.c.job_id.desc())
+        .limit(limit)
+        .offset(offset)
+    )).scalars().all()
+    if not ids:
+        return []
+
+    jobs = (await db.execute(
+        select(Job)
+        .where(Job.id.in_(ids))
+        .options(selectinload(Job.translations.and_(JobTranslation.lang_code == lang)))
+    )).scalars().all()
+    by_id = {j.id: j for j in jobs}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+async def listing_version(db, q, limit: int, lang: str) -> tuple[str, datetime | None]:
+    # cheap aggregate over the ids/timestamps of the page (plus the look-ahead row),
+    # so a changed, added or removed job changes the tag without loading any rows
+    page = q.with_only_columns(Job.id, Job.updated_at, Job.applications_count).limit(limit + 1).subquery()
+    tr_updated = (
+        select(func.max(JobTranslation.updated_at))
+        .where(
+            JobTranslation.job_id.in_(select(page.c.id)),
+            JobTranslation.lang_code == lang,
+        )
+        .scalar_subquery()
+    )
+    count, id_sum, job_updated, tr_updated, applicants = (await db.execute(
+        select(
+            func.count(page.c.id),
+            func.coalesce(func.sum(page.c.id), 0),
+            func.max(page.c.updated_at),
+            tr_updated,
+            func.coalesce(func.sum(page.c.applications_count), 0),
+        )
+    )).one()
+
+    # no Last-Modified for collections: a job leaving the page (deactivated, deleted) doesn't
+    # move the max timestamp of the rows still on it, so If-Modified-Since would answer 304
+    # for a changed page; count and id sum in the ETag do catch it
+    return make_etag("jobs", lang, limit, count, id_sum, job_updated, tr_updated, applicants), None
+
+
+async def job_version(db, job_id: int, lang: str):
+    row = (await db.execute(
+        select(
+            Job.updated_at,
+            select(func.max(JobTranslation.updated_at))
+            .where(JobTranslation.job_id == Job.id, JobTranslation.lang_code == lang)
+            .scalar_subquery(),
+            Job.applications_count,
+        ).where(Job.id == job_id, Job.is_active == True)
+    )).one_or_none()
+    if row is None:
+        return None
+
+    job_updated, tr_updated, applicants = row
+    return make_etag("job", job_id, lang, job_updated, tr_updated, applicants), latest(job_updated, tr_updated)
+
+
+def listing_cache_key(request, etag: str) -> tuple:
+    return (request.url.path, tuple(sorted(request.query_params.multi_items())), etag)
+
+
+def get_cached_listing(key: tuple):
+    return _listing_cache.get(key)
+
+
+def cache_listing(key: tuple, body) -> None:
+    _listing_cache.set(key, body)
+
+
+def invalidate_job_render(*job_ids: int) -> None:
+    ids = set(job_ids)
+    _render_cache.discard_where(lambda key: key[0] in ids)
+
 def job_to_dict(job: Job, lang: str | None = None) -> dict:
     lang = resolve_lang(lang)
 
@@ -31,6 +257,13 @@ def job_to_dict(job: Job, lang: str | None = None) -> dict:
         None
     )
 
+    # cached payloads are shared between requests, callers must not mutate them
+    # (applications_count changes without touching updated_at, so it's part of the key)
+    cache_key = (job.id, lang, job.updated_at, tr.updated_at if tr else None, job.applications_count)
+    data = _render_cache.get(cache_key)
+    if data is not None:
+        return data
+
     def pick(field: str):
         if tr:
             val = getattr(tr, field, None)
@@ -56,14 +289,17 @@ def job_to_dict(job: Job, lang: str | None = None) -> dict:
         "housing_provided": job.housing_provided,
         "transport_provided": job.transport_provided,
         "min_experience_years": job.min_experience_years,
+        "driving_license_required": job.driving_license_required,
         "is_active": job.is_active,
         "created_at": job.created_at,
         "updated_at": job.updated_at,
-        "image": job.image
+        "image": job.image,
+        "applications_count": job.applications_count,
     }
 
     # overlay translatable fields
     for f in TRANSLATABLE_FIELDS:
         data[f] = pick(f)
 
+    _render_cache.set(cache_key, data)
     return data
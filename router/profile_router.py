@@ -1,51 +1,93 @@
-from fastapi import Depends, HTTPException, APIRouter, UploadFile, File, status, Response
+from fastapi import Depends, HTTPException, APIRouter, UploadFile, File, status, Request, Response
+from fastapi.routing import APIRoute
 import uuid
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
 from botocore.exceptions import BotoCoreError, ClientError
 import os
-import boto3
 
 
 from models.user import User
-from database import get_db
+from database import get_db, get_async_db
 from services.security import SECRET_KEY, ALGORITHM
-from services.auth_deps import get_current_user
+from services.auth_deps import (
+    Principal, get_current_principal, get_current_user, get_current_user_cached, invalidate_user,
+)
 from models.user_experience import UserExperience
-from schemas.user import UserOut, UserExperienceCreate, UserExperienceOut, UserUpdate
+from schemas.user import (
+    UserOut, UserExperienceCreate, UserExperienceOut, UserUpdate,
+    CvPresignRequest, CvConfirmRequest,
+)
+from services.storage import (
+    CV_ALLOWED_TYPES, CV_MAX_BYTES, FileTooLarge,
+    upload_stream, delete_object, head_object, presigned_post,
+    cached_presigned_get_url, invalidate_presigned_url,
+)
 
-S3_BUCKET_NAME = os.getenv("CV_S3_BUCKET", "monova-s3-bucket")
-S3_REGION = os.getenv("AWS_REGION", "us-east-1")  # adjust if needed
+# multipart framing and form fields on top of the file itself
+CV_MULTIPART_OVERHEAD = 64 * 1024
 
-s3_client = boto3.client("s3", region_name=S3_REGION)
 
-profile_router = APIRouter()
+class _CvBodyLimitRoute(APIRoute):
+    # the multipart body is received and spooled before the handler runs, so CV_MAX_BYTES
+    # is enforced on the raw stream: Content-Length up front, a running count for chunked bodies
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        limit = CV_MAX_BYTES + CV_MULTIPART_OVERHEAD
+
+        async def limited_handler(request: Request):
+            if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+                return await handler(request)
+
+            length = request.headers.get("content-length")
+            if length and length.isdigit() and int(length) > limit:
+                raise _too_large()
+
+            receive = request.receive
+            received = 0
+
+            async def limited_receive():
+                nonlocal received
+                message = await receive()
+                if message["type"] == "http.request":
+                    received += len(message.get("body", b""))
+                    if received > limit:
+                        raise _too_large()
+                return message
+
+            return await handler(Request(request.scope, limited_receive))
+
+        return limited_handler
+
+
+profile_router = APIRouter(route_class=_CvBodyLimitRoute)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
 @profile_router.get("/loadProfileData", response_model=UserOut)
-def get_profile(current_user: str = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_profile(current_user: User = Depends(get_current_user_cached)):
     return current_user
 
 @profile_router.get("/profile/experience", response_model=list[UserExperienceOut])
-def list_experience(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def list_experience(
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    rows = db.execute(
+    rows = (await db.execute(
         select(UserExperience)
         .where(UserExperience.userId == current_user.userId)
         .order_by(UserExperience.UserExperienceId.asc())
-    ).scalars().all()
+    )).scalars().all()
     return rows
 
 
 @profile_router.post("/profile/experience", response_model=UserExperienceOut, status_code=201)
 def add_experience(
     payload: UserExperienceCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     exp = UserExperience(
@@ -61,7 +103,7 @@ def add_experience(
 @profile_router.delete("/profile/experience/{exp_id}", status_code=204)
 def delete_experience(
     exp_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     exp = db.execute(
@@ -100,126 +142,174 @@ def update_profile(
 
     db.add(current_user)
     db.commit()
+    invalidate_user(current_user.userId)
     db.refresh(current_user)
 
     return current_user
 
 @profile_router.get("/loadUserMeta", response_model=UserOut)
-def get_user_meta(current_user: str = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_user_meta(current_user: User = Depends(get_current_user_cached)):
     return current_user
 
 @profile_router.get("/profile/cv")
-def get_cv(
-    current_user: User = Depends(get_current_user),
+async def get_cv(
+    response: Response,
+    current_user: User = Depends(get_current_user_cached),
 ):
     if not current_user.cv_s3_key:
         raise HTTPException(status_code=404, detail="No CV uploaded")
 
-    url = s3_client.generate_presigned_url(
-        "get_object",
-        Params={"Bucket": S3_BUCKET_NAME, "Key": current_user.cv_s3_key},
-        ExpiresIn=3600,
-    )
+    url, expires_in = await cached_presigned_get_url(current_user.cv_s3_key)
+    # let the client reuse the response for (a bit less than) the URL's lifetime
+    response.headers["Cache-Control"] = f"private, max-age={max(expires_in - 60, 0)}"
     return {
         "original_name": current_user.cv_original_name,
         "url": url,
+        "expires_in": expires_in,
     }
 
-@profile_router.post("/profile/cv/upload", status_code=201)
-async def upload_cv(
-    file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    # 1) Basic validation
-    allowed_types = {
-        "application/pdf",
-        "application/msword",
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-    }
-
-    if file.content_type not in allowed_types:
+def _check_cv_type(content_type: str | None) -> None:
+    if content_type not in CV_ALLOWED_TYPES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Unsupported file type. Please upload a PDF or Word document.",
         )
 
-    # 2) Generate S3 key, grouped by userId
-    _, ext = os.path.splitext(file.filename or "")
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"CV is larger than {CV_MAX_BYTES // (1024 * 1024)} MB.",
+    )
+
+def _new_cv_key(user_id: int, filename: str | None) -> str:
+    _, ext = os.path.splitext(filename or "")
     ext = ext or ".pdf"
-    key = f"cvs/{current_user.userId}/{uuid.uuid4().hex}{ext}"
+    return f"cvs/{user_id}/{uuid.uuid4().hex}{ext}"
 
-    if current_user.cv_s3_key:
+async def _save_cv(db: AsyncSession, user_id: int, key: str, original_name: str | None) -> dict:
+    user = await db.get(User, user_id)
+    if not user:
+        # nothing will reference the object that was just uploaded
         try:
-            s3_client.delete_object(
-                Bucket=S3_BUCKET_NAME,
-                Key=current_user.cv_s3_key,
-            )
+            await delete_object(key)
+        except Exception as e:
+            print("Failed to delete orphaned CV:", repr(e))
+        raise HTTPException(status_code=404, detail="User not found")
+
+    old_key = user.cv_s3_key
+    user.cv_s3_key = key
+    user.cv_original_name = original_name
+    await db.commit()
+    invalidate_user(user_id)
+
+    # the old object goes only once the new one is stored and referenced
+    if old_key and old_key != key:
+        invalidate_presigned_url(old_key)
+        try:
+            await delete_object(old_key)
         except Exception as e:
             print("Failed to delete old CV:", repr(e))
 
     try:
-        # 3) Upload to S3
-        s3_client.upload_fileobj(
-            file.file,
-            S3_BUCKET_NAME,
-            key,
-            ExtraArgs={"ContentType": file.content_type or "application/octet-stream"},
-        )
+        presigned_url, expires_in = await cached_presigned_get_url(key)
+    except Exception:
+        presigned_url, expires_in = None, None
+
+    return {
+        "key": key,
+        "original_name": original_name,
+        "url": presigned_url,
+        "expires_in": expires_in,
+    }
+
+@profile_router.post("/profile/cv/upload", status_code=201)
+async def upload_cv(
+    file: UploadFile = File(...),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+):
+    _check_cv_type(file.content_type)
+    if file.size is not None and file.size > CV_MAX_BYTES:
+        raise _too_large()
+
+    key = _new_cv_key(current_user.userId, file.filename)
+
+    try:
+        await upload_stream(file.file, key, file.content_type)
+    except FileTooLarge:
+        raise _too_large()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload CV: {e}",
         )
 
-    # 4) Save metadata on the user (or in a separate table if you prefer)
-    current_user.cv_s3_key = key
-    current_user.cv_original_name = file.filename
-
-    db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
-
-    # 5) Optionally generate a short-lived presigned URL for immediate access
-    try:
-        presigned_url = s3_client.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": S3_BUCKET_NAME, "Key": key},
-            ExpiresIn=3600,  # 1 hour
-        )
-    except Exception:
-        presigned_url = None
+    return await _save_cv(db, current_user.userId, key, file.filename)
 
+@profile_router.post("/profile/cv/presign")
+async def presign_cv_upload(
+    payload: CvPresignRequest,
+    current_user: Principal = Depends(get_current_principal),
+):
+    # step 1 of the direct upload: the browser POSTs the file to `url` with `fields`
+    _check_cv_type(payload.content_type)
+    key = _new_cv_key(current_user.userId, payload.filename)
+    post = await presigned_post(key, payload.content_type)
     return {
         "key": key,
-        "original_name": file.filename,
-        "url": presigned_url,
+        "url": post["url"],
+        "fields": post["fields"],
+        "max_bytes": CV_MAX_BYTES,
     }
 
+@profile_router.post("/profile/cv/confirm", status_code=201)
+async def confirm_cv_upload(
+    payload: CvConfirmRequest,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # step 2: check the object really landed in this user's prefix before referencing it
+    if not payload.key.startswith(f"cvs/{current_user.userId}/"):
+        raise HTTPException(status_code=400, detail="Invalid CV key.")
+
+    try:
+        head = await head_object(payload.key)
+    except ClientError:
+        raise HTTPException(status_code=400, detail="CV upload not found.")
+
+    if head.get("ContentLength", 0) > CV_MAX_BYTES:
+        await delete_object(payload.key)
+        raise _too_large()
+
+    return await _save_cv(db, current_user.userId, payload.key, payload.original_name)
+
 @profile_router.delete("/profile/cv", status_code=204)
 async def delete_cv(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    user = await db.get(User, current_user.userId)
+
     # If user has no CV, return 404
-    if not current_user.cv_s3_key:
+    if not user or not user.cv_s3_key:
       raise HTTPException(status_code=404, detail="No CV to delete.")
 
-    key = current_user.cv_s3_key
+    key = user.cv_s3_key
 
     # Try to delete from S3 – but even if this fails, we still clear DB
     try:
-        s3_client.delete_object(Bucket=S3_BUCKET_NAME, Key=key)
+        await delete_object(key)
     except (BotoCoreError, ClientError) as e:
         print("S3 delete error:", repr(e))
         # You can either still continue, or raise 500 if you want strict behavior
 
     # Clear metadata on the user
-    current_user.cv_s3_key = None
-    current_user.cv_original_name = None
+    user.cv_s3_key = None
+    user.cv_original_name = None
 
-    db.add(current_user)
-    db.commit()
+    await db.commit()
+    invalidate_user(current_user.userId)
+    invalidate_presigned_url(key)
 
     # 204 No Content – nothing in body
-    return Response(status_code=204)
\ No newline at end of file
+    return Response(status_code=204)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 class AdminUserBase(BaseModel):
     userId: int
@@ -67,6 +67,7 @@ class AdminJobBase(BaseModel):
     benefits_text: Optional[str] = None
     is_active: bool
     image: Optional[str] = None
+    applications_count: int = 0
 
     class Config:
         orm_mode = True
@@ -166,3 +167,8 @@ class JobTranslationUpsert(BaseModel):
     documents_required: Optional[str] = None
     bonuses: Optional[str] = None
     language_required: Optional[str] = None
+
+
+class AdminJobImportRow(AdminJobUpdate):
+    # lang_code -> translated fields, applied after the job row is upserted
+    translations: Optional[Dict[str, JobTranslationUpsert]] = None
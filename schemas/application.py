@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Literal
 from datetime import datetime
 
 class ApplicationCreate(BaseModel):
@@ -23,6 +24,14 @@ class ApplicationOut(BaseModel):
     class Config:
         from_attributes = True
 
+class ApplicationBatchCreate(BaseModel):
+    job_ids: list[int] = Field(..., min_length=1, max_length=50)
+
+class ApplicationBatchResult(BaseModel):
+    job_id: int
+    outcome: Literal["created", "already_applied", "inactive"]
+    application: ApplicationOut | None = None
+
 class ApplicationWithJobOut(BaseModel):
     id: int
     status: str
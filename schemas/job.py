@@ -40,6 +40,7 @@ class JobCreate(JobBase):
 
 class JobOut(JobBase):
     id: int
+    applications_count: int = 0
 
     class Config:
         from_attributes = True
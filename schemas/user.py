@@ -68,3 +68,12 @@ class UserExperienceOut(UserExperienceBase):
     class Config:
         from_attributes = True
 
+
+
+class CvPresignRequest(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+    content_type: str
+
+class CvConfirmRequest(BaseModel):
+    key: str = Field(..., min_length=1, max_length=512)
+    original_name: Optional[str] = Field(None, max_length=255)
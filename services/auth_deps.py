@@ -1,47 +1,116 @@
+import os
+from dataclasses import dataclass
+from types import SimpleNamespace
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
+from database import get_db, get_async_db
 from models.user import User
+from services.cache import LRUCache
 from services.security import SECRET_KEY, ALGORITHM
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
-    credentials_exception = HTTPException(
+# column snapshots of recently seen users, keyed by userId
+_user_cache = LRUCache(
+    int(os.getenv("USER_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "60")),
+)
+
+_USER_COLUMNS = [c.key for c in User.__table__.columns]
+
+@dataclass(frozen=True)
+class Principal:
+    userId: int
+    isAdmin: bool
+    tokenVersion: int
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
     )
 
+def _decode(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        sub = payload.get("sub")
-        if sub is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
 
+def _user_id(payload: dict) -> int | None:
+    # very old tokens carry the email as "sub"
     try:
-        user_id = int(sub)
+        return int(payload["sub"])
     except (TypeError, ValueError):
-        user = db.query(User).filter(User.userEmail == sub).first()
-    else:
-        user = db.query(User).filter(User.userId == user_id).first()
+        return None
+
+def _user_lookup(payload: dict):
+    user_id = _user_id(payload)
+    if user_id is None:
+        return select(User).where(User.userEmail == payload["sub"]).limit(1)
+    return select(User).where(User.userId == user_id)
 
+def _check_token_version(payload: dict, user) -> None:
+    if payload.get("ver", 0) != (user.tokenVersion or 0):
+        raise _credentials_exception()
+
+def invalidate_user(user_id: int) -> None:
+    _user_cache.pop(user_id)
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> User:
+    # session-bound row, for endpoints that modify the user
+    payload = _decode(token)
+    user = db.execute(_user_lookup(payload)).scalar_one_or_none()
     if not user:
-        raise credentials_exception
+        raise _credentials_exception()
+    _check_token_version(payload, user)
+
+    return user
+
+async def get_current_user_cached(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> User:
+    # read-only copy of the user row, served from a short-TTL cache
+    payload = _decode(token)
+    user_id = _user_id(payload)
+
+    data = _user_cache.get(user_id) if user_id is not None else None
+    if data is None:
+        user = (await db.execute(_user_lookup(payload))).scalar_one_or_none()
+        if not user:
+            raise _credentials_exception()
+        data = {key: getattr(user, key) for key in _USER_COLUMNS}
+        _user_cache.set(user.userId, data)
 
+    user = SimpleNamespace(**data)
+    _check_token_version(payload, user)
     return user
 
-def get_current_admin(user: User = Depends(get_current_user)) -> User:
+async def get_current_principal(user: User = Depends(get_current_user_cached)) -> Principal:
+    # for endpoints that just need the caller's id; goes through the user cache so deleted
+    # users and revoked token versions are still rejected, usually without a DB round trip
+    return Principal(
+        userId=user.userId,
+        isAdmin=bool(user.isAdmin),
+        tokenVersion=user.tokenVersion or 0,
+    )
+
+def get_current_admin(user: User = Depends(get_current_user_cached)) -> User:
     if not user.isAdmin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required",
         )
-    return user
\ No newline at end of file
+    return user
@@ -0,0 +1,163 @@
+import os
+import zlib
+
+import brotli
+from fastapi import Request, Response
+from starlette.datastructures import Headers, MutableHeaders
+
+from services.fast_json import carry_headers
+from services.http_cache import encoding_etag
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+# cached bodies are compressed once and served many times, so they can afford a slower setting
+BROTLI_CACHED_QUALITY = int(os.getenv("BROTLI_CACHED_QUALITY", "9"))
+
+# preference order when the client accepts several
+ENCODINGS = ("br", "gzip")
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token.strip()] = q
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str, *, cached: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_CACHED_QUALITY if cached else BROTLI_QUALITY)
+    c = zlib.compressobj(9 if cached else GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    return c.compress(body) + c.flush()
+
+
+def _compressor(encoding: str):
+    if encoding == "br":
+        c = brotli.Compressor(quality=BROTLI_QUALITY)
+        return c.process, c.finish
+    c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return c.compress, c.flush
+
+
+class CachedBody:
+    # an encoded response body plus lazily built compressed variants of it
+    __slots__ = ("body", "headers", "_encoded")
+
+    def __init__(self, body: bytes, headers: dict | None = None):
+        self.body = body
+        self.headers = headers or {}
+        self._encoded = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = compress(self.body, encoding, cached=True)
+        return data
+
+    def response(self, request: Request, response: Response | None = None) -> Response:
+        headers = {**self.headers, "Vary": "Accept-Encoding"}
+        content = self.body
+        encoding = negotiate(request.headers.get("accept-encoding", ""))
+        if encoding and len(self.body) >= COMPRESS_MIN_SIZE:
+            content = self.encoded(encoding)
+            headers["Content-Encoding"] = encoding
+
+        out = Response(content, media_type="application/json", headers=headers)
+        if response is not None:
+            carry_headers(response, out)
+        if "Content-Encoding" in headers and "etag" in out.headers:
+            out.headers["ETag"] = encoding_etag(out.headers["etag"], encoding)
+        return out
+
+
+class CompressionMiddleware:
+    # gzip/brotli for everything else; responses that already carry a
+    # Content-Encoding (e.g. CachedBody) pass through untouched
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await self.app(scope, receive, _CompressingSend(send, encoding, self.minimum_size))
+
+
+class _CompressingSend:
+    def __init__(self, send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start = None
+        self.mode = None  # None until the first body chunk, then "plain" / "stream"
+        self.process = self.finish = None
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.mode is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            if (
+                "content-encoding" in headers
+                or self.start["status"] in (204, 304)
+                or (not more_body and len(body) < self.minimum_size)
+            ):
+                self.mode = "plain"
+                await self.send(self.start)
+                await self.send(message)
+                return
+
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if "etag" in headers:
+                headers["ETag"] = encoding_etag(headers["etag"], self.encoding)
+            if not more_body:
+                self.mode = "plain"
+                body = compress(body, self.encoding)
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+
+            # streamed response (e.g. exports): compress chunk by chunk
+            self.mode = "stream"
+            del headers["Content-Length"]
+            self.process, self.finish = _compressor(self.encoding)
+            await self.send(self.start)
+
+        if self.mode == "plain":
+            await self.send(message)
+            return
+
+        chunk = self.process(body)
+        if not more_body:
+            chunk += self.finish()
+        if chunk or not more_body:
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -0,0 +1,158 @@
+import os
+import time
+from threading import Lock
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes", "on")
+
+
+def pool_options(url: str, *, is_async: bool = False) -> dict:
+    # sqlite picks its own pool implementation, sizing options don't apply there
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", "true"),
+    }
+
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.in_use = 0
+            self.in_use_peak = 0
+            self.overflow_peak = 0
+            self.wait_count = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        overflow = self.pool.overflow() if hasattr(self.pool, "overflow") else 0
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.in_use_peak = max(self.in_use_peak, self.in_use)
+            self.overflow_peak = max(self.overflow_peak, overflow)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+            self.in_use = max(self.in_use - 1, 0)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def attach(self, pool) -> None:
+        self.pool = pool
+        pool._metrics = self
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+        event.listen(pool, "invalidate", self._on_invalidate)
+
+    def snapshot(self) -> dict:
+        pool = self.pool
+        with self._lock:
+            data = {
+                "name": self.name,
+                "pool_class": type(pool).__name__,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "in_use": self.in_use,
+                "in_use_peak": self.in_use_peak,
+                "overflow_peak": self.overflow_peak,
+                "checkout_wait_count": self.wait_count,
+                "checkout_wait_avg_ms": round(self.wait_total / self.wait_count * 1000, 3) if self.wait_count else 0.0,
+                "checkout_wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+        # live values straight from the pool, where it exposes them
+        for attr in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, attr):
+                data[attr] = getattr(pool, attr)()
+        if hasattr(pool, "_max_overflow"):
+            data["max_overflow"] = pool._max_overflow
+        if hasattr(pool, "_timeout"):
+            data["timeout"] = pool._timeout
+        return data
+
+
+class _TimedCheckoutMixin:
+    # pool events only fire once a connection is handed out, so the time spent
+    # waiting for one is measured around _do_get instead
+    def _do_get(self):
+        metrics = getattr(self, "_metrics", None)
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            if metrics:
+                metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if metrics:
+            metrics.record_wait(time.perf_counter() - start)
+        return conn
+
+    def recreate(self):
+        new_pool = super().recreate()
+        metrics = getattr(self, "_metrics", None)
+        if metrics:
+            metrics.pool = new_pool
+            new_pool._metrics = metrics
+        return new_pool
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+POOL_METRICS: dict[str, PoolMetrics] = {}
+
+
+def instrument_engine(engine, name: str) -> PoolMetrics:
+    metrics = PoolMetrics(name)
+    metrics.attach(engine.pool)
+    POOL_METRICS[name] = metrics
+    return metrics
+
+
+def pool_snapshot() -> list[dict]:
+    return [m.snapshot() for m in POOL_METRICS.values()]
@@ -0,0 +1,48 @@
+import os
+from functools import lru_cache
+
+import orjson
+from fastapi import Response
+from pydantic import TypeAdapter
+
+# kill switch: with FAST_JSON=false routes hand their data back to FastAPI's
+# regular response_model validation + jsonable_encoder path
+FAST_JSON = os.getenv("FAST_JSON", "true").lower() in ("1", "true", "yes")
+
+# headers owned by the body, never copied from the injected response
+_BODY_HEADERS = {b"content-length", b"content-type"}
+
+
+@lru_cache(maxsize=None)
+def adapter_for(tp) -> TypeAdapter:
+    # building a TypeAdapter compiles its validator/serializer, so do it once per type
+    return TypeAdapter(tp)
+
+
+def fast_response(data, model=None, *, response: Response | None = None, status_code: int = 200):
+    # model=None means trusted data we built ourselves (plain dicts/lists of JSON-able values):
+    # it goes straight to orjson. Otherwise ORM objects/rows are validated once against `model`
+    # by a cached TypeAdapter and serialized in pydantic-core.
+    if not FAST_JSON:
+        return data
+
+    if model is None:
+        body = dump_trusted(data)
+    else:
+        adapter = adapter_for(model)
+        body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+    out = Response(body, status_code=status_code, media_type="application/json")
+    if response is not None:
+        carry_headers(response, out)
+    return out
+
+
+def dump_trusted(data) -> bytes:
+    # OPT_UTC_Z: render UTC datetimes as "...Z" like pydantic does
+    return orjson.dumps(data, option=orjson.OPT_UTC_Z)
+
+
+def carry_headers(src: Response, dst: Response) -> None:
+    # returning a Response bypasses the injected one, so carry its headers (ETag, cursor...) over
+    dst.raw_headers.extend((k, v) for k, v in src.raw_headers if k not in _BODY_HEADERS)
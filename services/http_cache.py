@@ -0,0 +1,85 @@
+import hashlib
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+
+def make_etag(*parts) -> str:
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    return '"' + hashlib.sha1(raw.encode()).hexdigest() + '"'
+
+
+# compressed representations get their own validator, "<etag>-br" / "<etag>-gzip"
+_ENCODING_SUFFIX = re.compile(r'-(br|gzip)"$')
+
+
+def encoding_etag(etag: str, encoding: str) -> str:
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else etag
+
+
+def _base_etag(tag: str) -> str:
+    return _ENCODING_SUFFIX.sub('"', tag.removeprefix("W/"))
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    if value is None:
+        return None
+    # naive timestamps in our tables are stored as UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def latest(*values: datetime | None) -> datetime | None:
+    values = [_as_utc(v) for v in values if v is not None]
+    return max(values) if values else None
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match wins over If-Modified-Since, comparison is weak per RFC 9110
+        tags = [t.strip() for t in if_none_match.split(",")]
+        # any encoding of the same version matches
+        return "*" in tags or any(_base_etag(t) == _base_etag(etag) for t in tags)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _as_utc(last_modified) <= _as_utc(since)
+
+    return False
+
+
+def set_cache_headers(response: Response, etag: str, last_modified: datetime | None) -> None:
+    response.headers["ETag"] = etag
+    # clients may keep the body but have to revalidate before reusing it
+    response.headers["Cache-Control"] = "public, no-cache"
+    if last_modified is not None:
+        response.headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+
+
+def _client_encoding(request: Request, etag: str) -> str | None:
+    # the 304 has to carry the validator of the representation the client holds:
+    # take the encoding of the matching tag it sent, else what it would be served now
+    for tag in request.headers.get("if-none-match", "").split(","):
+        tag = tag.strip()
+        if tag != "*" and _base_etag(tag) == _base_etag(etag):
+            match = _ENCODING_SUFFIX.search(tag)
+            return match.group(1) if match else None
+
+    from services.compression import negotiate  # compression imports this module
+    return negotiate(request.headers.get("accept-encoding", ""))
+
+
+def not_modified(request: Request, etag: str, last_modified: datetime | None) -> Response:
+    encoding = _client_encoding(request, etag)
+    if encoding:
+        etag = encoding_etag(etag, encoding)
+    response = Response(status_code=304, headers={"Vary": "Accept-Encoding"})
+    set_cache_headers(response, etag, last_modified)
+    return response
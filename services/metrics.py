@@ -0,0 +1,198 @@
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from threading import Lock
+
+from sqlalchemy import event
+
+from services.db_pool import pool_snapshot
+from services.query_guard import new_guard
+from services.startup import STARTUP_TIMINGS
+
+# seconds, Prometheus convention
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() in ("1", "true", "yes", "on")
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "guard")
+
+    def __init__(self, guard=None):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.guard = guard
+
+
+# set per request by MetricsMiddleware; threadpool handlers inherit it with the context copy
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class RouteMetrics:
+    def __init__(self):
+        self._lock = Lock()
+        self.latency = {}    # (method, route) -> _Histogram
+        self.responses = {}  # (method, route, status) -> count
+        self.queries = {}    # (method, route) -> [queries, db seconds]
+
+    def record(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        key = (method, route)
+        with self._lock:
+            hist = self.latency.get(key)
+            if hist is None:
+                hist = self.latency[key] = _Histogram()
+            hist.observe(seconds)
+            self.responses[key + (status,)] = self.responses.get(key + (status,), 0) + 1
+            q = self.queries.setdefault(key, [0, 0.0])
+            q[0] += stats.queries
+            q[1] += stats.db_seconds
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            for (method, route), hist in sorted(self.latency.items()):
+                labels = f'method="{method}",route="{_escape(route)}"'
+                cumulative = 0
+                for bound, n in zip(LATENCY_BUCKETS + ("+Inf",), hist.counts):
+                    cumulative += n
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {hist.total:.6f}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} {hist.count}")
+
+            lines += ["# HELP http_responses_total Responses by route and status.", "# TYPE http_responses_total counter"]
+            for (method, route, status), n in sorted(self.responses.items()):
+                lines.append(f'http_responses_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {n}')
+
+            lines += ["# HELP db_queries_total SQL statements executed, by route.", "# TYPE db_queries_total counter"]
+            for (method, route), (n, _) in sorted(self.queries.items()):
+                lines.append(f'db_queries_total{{method="{method}",route="{_escape(route)}"}} {n}')
+
+            lines += ["# HELP db_query_seconds_total Time spent in SQL statements, by route.", "# TYPE db_query_seconds_total counter"]
+            for (method, route), (_, seconds) in sorted(self.queries.items()):
+                lines.append(f'db_query_seconds_total{{method="{method}",route="{_escape(route)}"}} {seconds:.6f}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+ROUTE_METRICS = RouteMetrics()
+
+
+def render_metrics() -> str:
+    lines = [
+        "# HELP db_pool_in_use Connections currently checked out.",
+        "# TYPE db_pool_in_use gauge",
+    ]
+    pools = pool_snapshot()
+    for pool in pools:
+        lines.append(f'db_pool_in_use{{pool="{pool["name"]}"}} {pool["in_use"]}')
+    lines += ["# HELP db_pool_timeouts_total Checkouts that hit the pool timeout.", "# TYPE db_pool_timeouts_total counter"]
+    for pool in pools:
+        lines.append(f'db_pool_timeouts_total{{pool="{pool["name"]}"}} {pool["timeouts"]}')
+    lines += ["# HELP app_startup_seconds Worker boot time by phase.", "# TYPE app_startup_seconds gauge"]
+    for phase, seconds in STARTUP_TIMINGS.items():
+        lines.append(f'app_startup_seconds{{phase="{phase}"}} {seconds:.6f}')
+    return ROUTE_METRICS.render() + "\n".join(lines) + "\n"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append((context, time.perf_counter()))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _, start = conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - start
+        if stats.guard is not None:
+            stats.guard.on_query(statement)
+
+
+def _handle_error(context):
+    # a failed statement never reaches after_cursor_execute; drop its start time so it
+    # doesn't stay on the pooled connection and skew later timings
+    conn = context.connection
+    stack = conn.info.get("query_start") if conn is not None else None
+    # only if the entry is still this statement's (after_cursor_execute may have popped it already)
+    if stack and stack[-1][0] is context.execution_context:
+        stack.pop()
+
+
+def instrument_queries(engine) -> None:
+    # engine is a sync Engine; for an AsyncEngine pass async_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class MetricsMiddleware:
+    def __init__(self, app, metrics: RouteMetrics = ROUTE_METRICS):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(new_guard(scope))
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if stats.guard is not None:
+                    stats.guard.on_response(stats.queries)
+                if SERVER_TIMING:
+                    # handler work is done by the time headers go out (streamed bodies excepted)
+                    app_ms = (time.perf_counter() - start) * 1000
+                    value = (
+                        f'app;dur={app_ms:.1f}, '
+                        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"'
+                    )
+                    message.setdefault("headers", []).append((b"server-timing", value.encode("latin-1")))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            self.metrics.record(scope["method"], _route_path(scope), status, time.perf_counter() - start, stats)
+
+
+def _route_path(scope) -> str:
+    # templated path keeps label cardinality bounded
+    return getattr(scope.get("route"), "path", None) or "unmatched"
+
+
+def query_budget(limit: int):
+    # per-route statement budget for the N+1 guard: dependencies=[Depends(query_budget(3))]
+    async def set_budget():
+        stats = _current.get()
+        if stats is not None and stats.guard is not None:
+            stats.guard.budget = limit
+    return set_budget
@@ -0,0 +1,67 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from models.outbox import OutboxEvent
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_MAX_BACKOFF = float(os.getenv("OUTBOX_MAX_BACKOFF", "600"))
+
+EMAIL_CONTACT_SUBMITTED = "email_contact.submitted"
+
+
+def enqueue(db, topic: str, payload: dict) -> None:
+    # added to the caller's session, so the event commits atomically with the change it describes
+    db.add(OutboxEvent(topic=topic, payload=payload))
+
+
+def handle_email_contact(payload: dict) -> None:
+    # delivery is at-least-once: handlers must tolerate seeing the same event twice
+    print(f"New contact message from {payload['userEmail']} (contact {payload['contact_id']}):")
+    print(payload["message"])
+
+
+HANDLERS = {
+    EMAIL_CONTACT_SUBMITTED: handle_email_contact,
+}
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(2 ** attempts, OUTBOX_MAX_BACKOFF))
+
+
+def drain_once(db, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    now = datetime.now(timezone.utc)
+    # SKIP LOCKED lets several workers drain the same table without handing out a row twice
+    # (ignored on SQLite, which only ever has a single writer anyway)
+    events = db.execute(
+        select(OutboxEvent)
+        .where(OutboxEvent.status == "pending", OutboxEvent.available_at <= now)
+        .order_by(OutboxEvent.available_at, OutboxEvent.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+
+    for event in events:
+        event.attempts += 1
+        try:
+            handler = HANDLERS.get(event.topic)
+            if handler is None:
+                raise LookupError(f"No handler for topic {event.topic!r}")
+            handler(event.payload)
+        except Exception as e:
+            event.last_error = repr(e)
+            if event.attempts >= OUTBOX_MAX_ATTEMPTS:
+                event.status = "failed"
+            else:
+                event.available_at = now + _backoff(event.attempts)
+            print(f"Outbox event {event.id} failed (attempt {event.attempts}):", repr(e))
+        else:
+            event.status = "done"
+            event.processed_at = datetime.now(timezone.utc)
+            event.last_error = None
+
+    db.commit()
+    return len(events)
@@ -0,0 +1,122 @@
+import os
+import re
+import sys
+import warnings
+from collections import Counter
+
+import greenlet
+
+# development/staging aid: "warn" emits NPlusOneWarning, "raise" fails the request
+# (and therefore the test) with NPlusOneError; "off" skips the bookkeeping entirely
+NPLUSONE_MODE = os.getenv("NPLUSONE_MODE", "off").lower()
+# the same statement shape this many times in one request is reported
+NPLUSONE_THRESHOLD = int(os.getenv("NPLUSONE_THRESHOLD", "5"))
+# default per-request statement budget, routes can override it with Depends(query_budget(n))
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "25"))
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SELF = os.path.abspath(__file__)
+_METRICS = os.path.join(PROJECT_ROOT, "services", "metrics.py")
+
+_IN_LIST = re.compile(r"\(\s*(?:\?|\$\d+|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|\$\d+|%\(\w+\)s|:\w+))*\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_SPACE = re.compile(r"\s+")
+
+
+class NPlusOneWarning(UserWarning):
+    pass
+
+
+class NPlusOneError(RuntimeError):
+    pass
+
+
+def fingerprint(statement: str) -> str:
+    # expanded IN lists and inlined numbers shouldn't make otherwise identical queries distinct
+    statement = _IN_LIST.sub("(?)", statement)
+    statement = _NUMBER.sub("?", statement)
+    return _SPACE.sub(" ", statement).strip()
+
+
+def _frames():
+    frame = sys._getframe(1)
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+    # async sessions run the DB call in a child greenlet; the awaiting handler is in its parents
+    parent = greenlet.getcurrent().parent
+    while parent is not None:
+        frame = parent.gr_frame
+        while frame is not None:
+            yield frame
+            frame = frame.f_back
+        parent = parent.parent
+
+
+def locate() -> tuple[str | None, str | None]:
+    # (lazy-loaded relationship, innermost project frame) behind the current statement
+    attribute = location = None
+    for frame in _frames():
+        code = frame.f_code
+        if attribute is None and code.co_name == "_load_for_state":
+            # sqlalchemy.orm.strategies.LazyLoader: self.parent_property is e.g. Application.job
+            prop = getattr(frame.f_locals.get("self"), "parent_property", None)
+            if prop is not None:
+                attribute = str(prop)
+        filename = os.path.abspath(code.co_filename)
+        if (
+            location is None
+            and filename.startswith(PROJECT_ROOT)
+            and "site-packages" not in filename
+            and filename not in (_SELF, _METRICS)
+        ):
+            location = f"{os.path.relpath(filename, PROJECT_ROOT)}:{frame.f_lineno} in {code.co_name}"
+        if attribute and location:
+            break
+    return attribute, location
+
+
+def _report(message: str) -> None:
+    if NPLUSONE_MODE == "raise":
+        raise NPlusOneError(message)
+    warnings.warn(message, NPlusOneWarning, stacklevel=2)
+
+
+class QueryGuard:
+    __slots__ = ("scope", "fingerprints", "budget")
+
+    def __init__(self, scope, budget: int = QUERY_BUDGET):
+        self.scope = scope
+        self.fingerprints = Counter()
+        self.budget = budget
+
+    @property
+    def route(self) -> str:
+        # the router fills scope["route"] in before the handler runs
+        route = self.scope.get("route")
+        return f'{self.scope.get("method")} {getattr(route, "path", None) or self.scope.get("path")}'
+
+    def on_query(self, statement: str) -> None:
+        fp = fingerprint(statement)
+        self.fingerprints[fp] += 1
+        # reported once, when the shape first crosses the threshold
+        if self.fingerprints[fp] == NPLUSONE_THRESHOLD:
+            attribute, location = locate()
+            _report(
+                f"Possible N+1 in {self.route}: the same statement ran {NPLUSONE_THRESHOLD} times"
+                + (f", lazy load of {attribute}" if attribute else "")
+                + (f", from {location}" if location else "")
+                + f": {fp[:300]}"
+            )
+
+    def on_response(self, total: int) -> None:
+        if self.budget and total > self.budget:
+            top, n = self.fingerprints.most_common(1)[0]
+            _report(
+                f"{self.route} issued {total} statements (budget {self.budget}); "
+                f"most repeated ({n}x): {top[:300]}"
+            )
+
+
+def new_guard(scope) -> QueryGuard | None:
+    return QueryGuard(scope) if NPLUSONE_MODE in ("warn", "raise") else None
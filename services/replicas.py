@@ -0,0 +1,100 @@
+import os
+import time
+from itertools import count
+
+from jose import jwt, JWTError
+
+from services.cache import LRUCache
+from services.security import SECRET_KEY, ALGORITHM
+
+# how long a caller's reads stay on the primary after one of its own writes
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+# a replica that failed to hand out a connection is skipped for this long
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
+# returned on writes; clients echo it back so reads landing on another worker stay on the primary
+RYW_HEADER = "X-Read-Your-Writes"
+UNSAFE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+# JWT subjects that wrote recently, for the reads this worker serves
+_recent_writers = LRUCache(
+    int(os.getenv("READ_YOUR_WRITES_CACHE_SIZE", "10000")),
+    ttl=READ_YOUR_WRITES_SECONDS,
+)
+
+
+class Replica:
+    __slots__ = ("name", "engine", "async_engine", "down_until")
+
+    def __init__(self, name: str, engine, async_engine):
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+        self.down_until = 0.0
+
+
+class ReplicaSet:
+    def __init__(self, replicas: list[Replica]):
+        self.replicas = replicas
+        self._next = count()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def candidates(self) -> list[Replica]:
+        # round-robin starting point, replicas marked down are left out until their retry time
+        if not self.replicas:
+            return []
+        start = next(self._next) % len(self.replicas)
+        now = time.monotonic()
+        return [r for r in self.replicas[start:] + self.replicas[:start] if r.down_until <= now]
+
+    def mark_down(self, replica: Replica, error: Exception) -> None:
+        replica.down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+        print(f"Replica {replica.name} unavailable, using others for {REPLICA_RETRY_SECONDS:.0f}s:", repr(error))
+
+
+def _subject(authorization: str | None) -> str | None:
+    # the bearer token's verified "sub"; anonymous or invalid tokens have none
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+
+def wants_primary(request) -> bool:
+    # echoed marker first (works across workers), capped so a client can't pin itself to the primary
+    echoed = request.headers.get(RYW_HEADER)
+    if echoed:
+        try:
+            if 0 < float(echoed) - time.time() <= READ_YOUR_WRITES_SECONDS:
+                return True
+        except ValueError:
+            pass
+    subject = _subject(request.headers.get("authorization"))
+    return subject is not None and _recent_writers.get(subject) is not None
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in UNSAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                authorization = next((v for k, v in scope["headers"] if k == b"authorization"), b"")
+                subject = _subject(authorization.decode("latin-1"))
+                if subject is not None:
+                    _recent_writers.set(subject, True)
+                until = f"{time.time() + READ_YOUR_WRITES_SECONDS:.0f}"
+                message.setdefault("headers", []).append((RYW_HEADER.lower().encode(), until.encode()))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,4 +1,8 @@
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+import asyncio
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from dotenv import load_dotenv
@@ -9,7 +13,12 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
 ALGORITHM = "HS256"
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# changing BCRYPT_ROUNDS makes needs_update() true for old hashes, they get rehashed on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=int(os.getenv("BCRYPT_ROUNDS", "12")),
+)
 
 def hash_password(password: str) -> str:
   return pwd_context.hash(password)
@@ -21,4 +30,91 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
\ No newline at end of file
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+# --- bcrypt off the request threadpool ---
+
+class HasherBusy(Exception):
+    pass
+
+
+class _PasswordHasher:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = Lock()
+        self.pending = 0
+        self.pending_peak = 0
+        self.rejected = 0
+        self.stats = {}
+
+    def _record(self, op: str, waited: float, took: float) -> None:
+        with self._lock:
+            s = self.stats.setdefault(op, {"count": 0, "total": 0.0, "max": 0.0, "wait_total": 0.0, "wait_max": 0.0})
+            s["count"] += 1
+            s["total"] += took
+            s["max"] = max(s["max"], took)
+            s["wait_total"] += waited
+            s["wait_max"] = max(s["wait_max"], waited)
+
+    def _done(self, _future) -> None:
+        with self._lock:
+            self.pending -= 1
+
+    async def run(self, op: str, fn, *args):
+        with self._lock:
+            # fail fast instead of letting a login burst queue up behind bcrypt
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HasherBusy()
+            self.pending += 1
+            self.pending_peak = max(self.pending_peak, self.pending)
+
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self._record(op, started - submitted, time.perf_counter() - started)
+
+        future = self._executor.submit(timed)
+        future.add_done_callback(self._done)
+        return await asyncio.wrap_future(future)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            ops = {
+                op: {
+                    "count": s["count"],
+                    "avg_ms": round(s["total"] / s["count"] * 1000, 3),
+                    "max_ms": round(s["max"] * 1000, 3),
+                    "queue_wait_avg_ms": round(s["wait_total"] / s["count"] * 1000, 3),
+                    "queue_wait_max_ms": round(s["wait_max"] * 1000, 3),
+                }
+                for op, s in self.stats.items()
+            }
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "pending_peak": self.pending_peak,
+                "rejected": self.rejected,
+                "operations": ops,
+            }
+
+
+password_hasher = _PasswordHasher(
+    workers=int(os.getenv("HASH_WORKERS", "2")),
+    max_pending=int(os.getenv("HASH_MAX_PENDING", "32")),
+)
+
+async def hash_password_async(password: str) -> str:
+    return await password_hasher.run("hash", pwd_context.hash, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    # returns (valid, new_hash); new_hash is set when the stored hash uses outdated settings
+    return await password_hasher.run("verify", pwd_context.verify_and_update, plain_password, hashed_password)
@@ -0,0 +1,22 @@
+import time
+
+# phase -> seconds, filled in while the worker boots and by lazily built clients on first use
+STARTUP_TIMINGS: dict[str, float] = {}
+
+_last_mark = time.perf_counter()
+
+
+def mark(phase: str) -> None:
+    # records the time since the previous mark; main.py calls this between its import groups
+    global _last_mark
+    now = time.perf_counter()
+    STARTUP_TIMINGS[phase] = now - _last_mark
+    _last_mark = now
+
+
+def record(phase: str, seconds: float) -> None:
+    STARTUP_TIMINGS[phase] = seconds
+
+
+def report() -> str:
+    return ", ".join(f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in STARTUP_TIMINGS.items())
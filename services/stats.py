@@ -0,0 +1,150 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import String, cast, delete, func, select, update
+
+from database import dialect_insert
+from models.application import Application
+from models.job import Job
+from models.stats import StatCounter
+from models.user import User
+
+APPLICATIONS_BY_DAY = "applications_by_day"
+APPLICATIONS_BY_JOB = "applications_by_job"
+APPLICATIONS_BY_COUNTRY = "applications_by_country"
+APPLICATIONS_BY_STATUS = "applications_by_status"
+SIGNUPS_BY_DAY = "signups_by_day"
+
+
+def _day(value: datetime | None) -> str:
+    return (value or datetime.now(timezone.utc)).date().isoformat()
+
+
+def application_buckets(app: Application, country) -> list[tuple[str, str]]:
+    # country may also be a SQL expression, resolved inside the upsert
+    return [
+        (APPLICATIONS_BY_DAY, _day(app.created_at)),
+        (APPLICATIONS_BY_JOB, str(app.job_id)),
+        (APPLICATIONS_BY_COUNTRY, country),
+        (APPLICATIONS_BY_STATUS, app.status),
+    ]
+
+
+def signup_buckets(user: User) -> list[tuple[str, str]]:
+    return [(SIGNUPS_BY_DAY, _day(user.userCreatedAt))]
+
+
+def _bump_stmt(db, buckets, delta: int):
+    insert = dialect_insert(db)
+    # a bucket may only appear once per upsert, so repeats are folded into one row
+    stmt = insert(StatCounter).values([
+        {"dimension": dimension, "bucket": bucket, "count": delta * n}
+        for (dimension, bucket), n in Counter(buckets).items()
+    ])
+    return stmt.on_conflict_do_update(
+        index_elements=[StatCounter.dimension, StatCounter.bucket],
+        set_={"count": StatCounter.count + stmt.excluded.count},
+    )
+
+
+# both run inside the caller's transaction, so counters commit (or roll back) with the row
+def bump_stats(db, buckets, delta: int = 1) -> None:
+    db.execute(_bump_stmt(db, buckets, delta))
+
+
+async def bump_stats_async(db, buckets, delta: int = 1) -> None:
+    await db.execute(_bump_stmt(db, buckets, delta))
+
+
+def bump_applications_count(db, job_ids, delta: int = 1) -> None:
+    # relative UPDATE so concurrent applications don't lose increments; updated_at is
+    # pinned because a new applicant isn't a content change (it would bust every job cache)
+    db.execute(
+        update(Job)
+        .where(Job.id.in_(job_ids))
+        .values(applications_count=Job.applications_count + delta, updated_at=Job.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def recount_applications(db) -> None:
+    # bulk repair of Job.applications_count in one correlated UPDATE
+    db.execute(
+        update(Job)
+        .values(
+            applications_count=select(func.count(Application.id))
+            .where(Application.job_id == Job.id)
+            .scalar_subquery(),
+            updated_at=Job.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def rebuild_stats(db) -> None:
+    # full recount, for the initial backfill and to repair drift (e.g. cascading deletes)
+    day = lambda col: cast(func.date(col), String)
+    sources = [
+        (APPLICATIONS_BY_DAY, select(day(Application.created_at), func.count()).group_by(day(Application.created_at))),
+        (APPLICATIONS_BY_JOB, select(cast(Application.job_id, String), func.count()).group_by(Application.job_id)),
+        (APPLICATIONS_BY_COUNTRY, select(Job.country, func.count()).select_from(Application).join(Job, Job.id == Application.job_id).group_by(Job.country)),
+        (APPLICATIONS_BY_STATUS, select(Application.status, func.count()).group_by(Application.status)),
+        (SIGNUPS_BY_DAY, select(day(User.userCreatedAt), func.count()).where(User.userCreatedAt.isnot(None)).group_by(day(User.userCreatedAt))),
+    ]
+
+    db.execute(delete(StatCounter))
+    for dimension, q in sources:
+        rows = [
+            {"dimension": dimension, "bucket": bucket, "count": count}
+            for bucket, count in db.execute(q).all()
+        ]
+        if rows:
+            db.execute(StatCounter.__table__.insert(), rows)
+    db.commit()
+
+
+def load_stats(db, *, days: int, top_jobs: int) -> dict:
+    # reads only the summary table: cost is proportional to the number of buckets
+    since = (datetime.now(timezone.utc).date() - timedelta(days=days - 1)).isoformat()
+
+    def buckets(dimension, *where, order_by=StatCounter.bucket.asc(), limit=None):
+        q = (
+            select(StatCounter.bucket, StatCounter.count)
+            .where(StatCounter.dimension == dimension, StatCounter.count != 0, *where)
+            .order_by(order_by)
+            .limit(limit)
+        )
+        return db.execute(q).all()
+
+    by_status = buckets(APPLICATIONS_BY_STATUS)
+    by_job = buckets(APPLICATIONS_BY_JOB, order_by=StatCounter.count.desc(), limit=top_jobs)
+    titles = dict(
+        db.execute(select(Job.id, Job.title).where(Job.id.in_([int(b) for b, _ in by_job]))).all()
+    ) if by_job else {}
+    signups_total = db.execute(
+        select(func.coalesce(func.sum(StatCounter.count), 0)).where(StatCounter.dimension == SIGNUPS_BY_DAY)
+    ).scalar_one()
+
+    return {
+        "applications": {
+            "total": sum(c for _, c in by_status),
+            "by_day": [
+                {"day": b, "count": c}
+                for b, c in buckets(APPLICATIONS_BY_DAY, StatCounter.bucket >= since)
+            ],
+            "by_job": [
+                {"job_id": int(b), "title": titles.get(int(b)), "count": c}
+                for b, c in by_job
+            ],
+            "by_country": {b: c for b, c in buckets(APPLICATIONS_BY_COUNTRY)},
+            "by_status": {b: c for b, c in by_status},
+        },
+        "users": {
+            "total": signups_total,
+            "signups_by_day": [
+                {"day": b, "count": c}
+                for b, c in buckets(SIGNUPS_BY_DAY, StatCounter.bucket >= since)
+            ],
+        },
+    }
@@ -0,0 +1,164 @@
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from services import startup
+from services.cache import LRUCache
+
+S3_BUCKET_NAME = os.getenv("CV_S3_BUCKET", "monova-s3-bucket")
+S3_REGION = os.getenv("AWS_REGION", "us-east-1")  # adjust if needed
+# point at MinIO / moto_server for local runs
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+
+S3_WORKERS = int(os.getenv("S3_WORKERS", "4"))
+
+CV_MAX_BYTES = int(os.getenv("CV_MAX_BYTES", str(10 * 1024 * 1024)))
+CV_URL_EXPIRES = 3600
+# a cached URL is handed out only while it has at least this many seconds left
+CV_URL_MIN_REMAINING = int(os.getenv("CV_URL_MIN_REMAINING", "300"))
+CV_ALLOWED_TYPES = {
+    "application/pdf",
+    "application/msword",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+# boto3 is blocking; S3 calls run here so they never stall the event loop
+_executor = ThreadPoolExecutor(max_workers=S3_WORKERS, thread_name_prefix="s3")
+
+_s3_client = None
+_transfer_config = None
+_s3_lock = Lock()
+
+
+def get_s3_client():
+    # importing boto3 and building the client is a large share of worker boot time,
+    # so it happens on the first S3 call instead of at import
+    global _s3_client, _transfer_config
+    if _s3_client is None:
+        with _s3_lock:
+            if _s3_client is None:
+                start = time.perf_counter()
+                import boto3
+                from boto3.s3.transfer import TransferConfig
+                from botocore.config import Config
+
+                # multipart upload, streamed part by part from inside the worker thread
+                _transfer_config = TransferConfig(
+                    multipart_threshold=8 * 1024 * 1024,
+                    multipart_chunksize=8 * 1024 * 1024,
+                    use_threads=False,
+                )
+                _s3_client = boto3.client(
+                    "s3",
+                    region_name=S3_REGION,
+                    endpoint_url=S3_ENDPOINT_URL,
+                    config=Config(max_pool_connections=S3_WORKERS * 2),
+                )
+                startup.record("lazy:s3_client", time.perf_counter() - start)
+    return _s3_client
+
+
+class FileTooLarge(Exception):
+    pass
+
+
+class _LimitedReader:
+    # stops the transfer as soon as the limit is crossed, instead of after the fact
+    def __init__(self, fileobj, limit: int):
+        self._fileobj = fileobj
+        self._limit = limit
+        self.read_bytes = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._fileobj.read(size)
+        self.read_bytes += len(chunk)
+        if self.read_bytes > self._limit:
+            raise FileTooLarge()
+        return chunk
+
+
+async def run_s3(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+def _call(method: str, *args, **kwargs):
+    # resolved in the worker thread, so the first call's client setup stays off the event loop
+    return getattr(get_s3_client(), method)(*args, **kwargs)
+
+
+def _upload(fileobj, key: str, content_type: str, max_bytes: int) -> int:
+    reader = _LimitedReader(fileobj, max_bytes)
+    get_s3_client().upload_fileobj(
+        reader,
+        S3_BUCKET_NAME,
+        key,
+        ExtraArgs={"ContentType": content_type},
+        Config=_transfer_config,
+    )
+    return reader.read_bytes
+
+
+async def upload_stream(fileobj, key: str, content_type: str, max_bytes: int = CV_MAX_BYTES) -> int:
+    return await run_s3(_upload, fileobj, key, content_type, max_bytes)
+
+
+async def delete_object(key: str) -> None:
+    await run_s3(_call, "delete_object", Bucket=S3_BUCKET_NAME, Key=key)
+
+
+async def head_object(key: str) -> dict:
+    return await run_s3(_call, "head_object", Bucket=S3_BUCKET_NAME, Key=key)
+
+
+async def presigned_get_url(key: str, expires_in: int = CV_URL_EXPIRES) -> str:
+    return await run_s3(
+        _call,
+        "generate_presigned_url",
+        "get_object",
+        Params={"Bucket": S3_BUCKET_NAME, "Key": key},
+        ExpiresIn=expires_in,
+    )
+
+
+# key -> (url, wall-clock expiry); entries drop out once they get too close to expiry
+_url_cache = LRUCache(
+    int(os.getenv("CV_URL_CACHE_SIZE", "10000")),
+    ttl=CV_URL_EXPIRES - CV_URL_MIN_REMAINING,
+)
+
+
+async def cached_presigned_get_url(key: str) -> tuple[str, int]:
+    # returns the url and its remaining lifetime in seconds
+    entry = _url_cache.get(key)
+    if entry is None:
+        url = await presigned_get_url(key)
+        entry = (url, time.time() + CV_URL_EXPIRES)
+        _url_cache.set(key, entry)
+
+    url, expires_at = entry
+    return url, int(expires_at - time.time())
+
+
+def invalidate_presigned_url(key: str | None) -> None:
+    if key:
+        _url_cache.pop(key)
+
+
+async def presigned_post(key: str, content_type: str, max_bytes: int = CV_MAX_BYTES, expires_in: int = 600) -> dict:
+    # the bucket enforces type and size itself, the browser uploads without touching our API
+    return await run_s3(
+        _call,
+        "generate_presigned_post",
+        Bucket=S3_BUCKET_NAME,
+        Key=key,
+        Fields={"Content-Type": content_type},
+        Conditions=[
+            {"Content-Type": content_type},
+            ["content-length-range", 1, max_bytes],
+        ],
+        ExpiresIn=expires_in,
+    )